@@ -4,36 +4,140 @@ Handles JWT tokens, password hashing, and user permissions.
 """
 
 import os
-from datetime import datetime, timedelta
+import asyncio
+import functools
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from cachetools import TTLCache
+try:
+    # PyJWT: faster HS256 path than python-jose
+    import jwt
+    from jwt import PyJWTError as JWTError
+    JWT_BACKEND = "pyjwt"
+except ImportError:
+    from jose import JWTError, jwt
+    JWT_BACKEND = "jose"
+
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy.orm import Session, joinedload, load_only, make_transient_to_detached
+from pydantic import BaseModel, ConfigDict
 
 from app.db.models import SessionLocal, User
 
+# JWT JSON codec
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _OrjsonCodec:
+    """json-module stand-in for PyJWT's header/claims (de)serialization."""
+
+    @staticmethod
+    def dumps(obj, *, cls=None, sort_keys=False, **kwargs):
+        if cls is None:
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode()
+            except TypeError:
+                pass
+        return json.dumps(obj, cls=cls, sort_keys=sort_keys, **kwargs)
+
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+
+if orjson is not None and JWT_BACKEND == "pyjwt":
+    jwt.api_jws.json = _OrjsonCodec()
+    jwt.api_jwt.json = _OrjsonCodec()
+
+
 # Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret-key-CHANGE-IN-PRODUCTION")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 7
+ACCESS_TOKEN_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_DAYS * 86400
+
+# Reuse signed tokens for identical payloads within a 60s exp bucket.
+# Opt-in: deployments that want every login to mint a distinct token leave it off.
+JWT_REUSE = os.getenv("JWT_REUSE", "0") == "1"
+JWT_REUSE_BUCKET_SECONDS = 60
+_STANDARD_CLAIMS = frozenset({"user_id", "email", "club_id", "role"})
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2id for new hashes; bcrypt kept so existing hashes still verify and
+# get upgraded on the next successful login. Set BCRYPT_ROUNDS=4 for tests.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+)
+
+# Hashing is CPU-bound and releases the GIL; run it off the event loop.
+_bcrypt_pool = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="pwhash")
+
+# Shared auth failures. Raised with a cleared traceback so the reused
+# instances don't accumulate frames from earlier requests.
+_EXC_INVALID = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+_EXC_NOT_FOUND = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="User not found"
+)
+_EXC_INACTIVE = HTTPException(
+    status_code=status.HTTP_403_FORBIDDEN,
+    detail="User account is inactive"
+)
+
+# Roles that can see every session in their club
+_ELEVATED_ROLES = frozenset({"coach", "admin"})
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Decoded token cache, keyed by sha256(token). Entries never outlive the
+# token's own exp claim, and invalid tokens are never cached.
+JWT_CACHE_TTL_SECONDS = 60
+_jwt_cache = TTLCache(maxsize=10000, ttl=JWT_CACHE_TTL_SECONDS)
+_jwt_cache_lock = threading.Lock()
 
-# Pydantic models for tokens
+# Short-lived snapshot of the authenticated user, keyed by the same token hash.
+# Lets get_current_user skip the users SELECT on hot paths.
+USER_CACHE_TTL_SECONDS = 30
+_user_cache = TTLCache(maxsize=5000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = threading.Lock()
+
+
+# Token models
 class Token(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     access_token: str
     token_type: str
 
 
-class TokenData(BaseModel):
+@dataclass(slots=True, frozen=True)
+class TokenData:
+    """Claims decoded from an access token (internal only, never serialized)."""
     user_id: Optional[int] = None
     email: Optional[str] = None
     club_id: Optional[int] = None
@@ -51,7 +155,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a plain text password on the password hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, pwd_context.hash, password)
+
+
 # JWT token utilities
+@functools.lru_cache(maxsize=2048)
+def _sign(user_id, email, club_id, role, exp_bucket: int) -> str:
+    """Sign a standard access token payload; memoized per exp bucket."""
+    return jwt.encode(
+        {"user_id": user_id, "email": email, "club_id": club_id, "role": role, "exp": exp_bucket},
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -63,17 +183,87 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         Encoded JWT token string
     """
-    to_encode = data.copy()
+    # exp as integer epoch seconds; both JWT libraries compare it to time.time()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = int(time.time() + expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
+        expire = int(time.time()) + ACCESS_TOKEN_EXPIRE_SECONDS
+
+    if JWT_REUSE and expires_delta is None and data.keys() <= _STANDARD_CLAIMS:
+        # Round exp down to the bucket so identical logins reuse one signature
+        exp_bucket = expire - expire % JWT_REUSE_BUCKET_SECONDS
+        return _sign(
+            data.get("user_id"), data.get("email"), data.get("club_id"), data.get("role"), exp_bucket
+        )
 
-    to_encode.update({"exp": expire})
+    to_encode = data.copy()
+    to_encode["exp"] = expire
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def _token_key(token: str) -> bytes:
+    """Cache key for a raw bearer token."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+def invalidate_token(token: str) -> None:
+    """Drop a token from the decode cache (e.g. on logout)."""
+    with _jwt_cache_lock:
+        _jwt_cache.pop(_token_key(token), None)
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Drop cached snapshots for a user.
+
+    Call after changing a user's role, club, active flag or profile so the
+    next request sees the new values.
+    """
+    with _user_cache_lock:
+        stale = [key for key, snap in _user_cache.items() if snap[0] == user_id]
+        for key in stale:
+            _user_cache.pop(key, None)
+
+
+def _decode_raw(token: str) -> dict:
+    """
+    Verify a JWT and return its claims dict.
+
+    Successful decodes are cached for at most JWT_CACHE_TTL_SECONDS, and never
+    past the token's expiry. Internal hot path; external callers should use
+    decode_access_token.
+
+    Raises:
+        HTTPException: If token is invalid or expired
+    """
+    key = _token_key(token)
+    now = time.time()
+    with _jwt_cache_lock:
+        cached = _jwt_cache.get(key)
+    if cached is not None:
+        valid_until, payload = cached
+        if now < valid_until:
+            return payload
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _EXC_INVALID.with_traceback(None) from None
+
+    if payload.get("user_id") is None or payload.get("email") is None:
+        raise _EXC_INVALID.with_traceback(None)
+
+    exp = payload.get("exp")
+    valid_until = now + JWT_CACHE_TTL_SECONDS
+    if exp is not None:
+        valid_until = min(valid_until, float(exp))
+    with _jwt_cache_lock:
+        _jwt_cache[key] = (valid_until, payload)
+
+    return payload
+
+
 def decode_access_token(token: str) -> TokenData:
     """
     Decode and validate a JWT token.
@@ -87,32 +277,8 @@ def decode_access_token(token: str) -> TokenData:
     Raises:
         HTTPException: If token is invalid or expired
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("user_id")
-        email: str = payload.get("email")
-        club_id: int = payload.get("club_id")
-        role: str = payload.get("role")
-
-        if user_id is None or email is None:
-            raise credentials_exception
-
-        token_data = TokenData(
-            user_id=user_id,
-            email=email,
-            club_id=club_id,
-            role=role
-        )
-        return token_data
-
-    except JWTError:
-        raise credentials_exception
+    payload = _decode_raw(token)
+    return TokenData(payload["user_id"], payload["email"], payload.get("club_id"), payload.get("role"))
 
 
 # Database dependency
@@ -144,25 +310,75 @@ def get_current_user(
         HTTPException: If authentication fails
     """
     token = credentials.credentials
-    token_data = decode_access_token(token)
+    payload = _decode_raw(token)
+    key = _token_key(token)
+
+    with _user_cache_lock:
+        snapshot = _user_cache.get(key)
+
+    if snapshot is not None:
+        user_id, email, role, club_id, is_active = snapshot
+        if not is_active:
+            raise _EXC_INACTIVE.with_traceback(None)
+        # Rebuild a persistent User bound to this request's session; any
+        # other column is lazy-loaded on first access.
+        user = User(id=user_id, email=email, role=role, club_id=club_id, is_active=is_active)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+
+    return _load_current_user(db, payload["user_id"], key)
 
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+
+def _load_current_user(db: Session, user_id: int, key: bytes, *options) -> User:
+    """Query the authenticated user, refresh the snapshot cache and check it is active."""
+    # Only hydrate the columns auth needs; password_hash and profile fields
+    # stay unloaded until a handler actually touches them.
+    user = db.query(User).options(
+        load_only(User.id, User.email, User.role, User.club_id, User.is_active),
+        *options
+    ).filter(User.id == user_id).first()
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+        raise _EXC_NOT_FOUND.with_traceback(None)
+
+    with _user_cache_lock:
+        _user_cache[key] = (user.id, user.email, user.role, user.club_id, user.is_active)
 
     if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User account is inactive"
-        )
+        raise _EXC_INACTIVE.with_traceback(None)
+
+    return user
+
+
+def get_current_user_with_subscription(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Like get_current_user, but loads the user's active subscription in the
+    same SELECT when the features cache is cold.
 
+    Used by subscription-gated endpoints so they need one round-trip instead
+    of two.
+    """
+    user_id = _decode_raw(credentials.credentials)["user_id"]
+
+    with _features_cache_lock:
+        features_cached = user_id in _features_cache
+    if features_cached:
+        return get_current_user(credentials, db)
+
+    user = _load_current_user(
+        db, user_id, _token_key(credentials.credentials),
+        joinedload(User.active_subscription)
+    )
+    with _features_cache_lock:
+        _features_cache[user.id] = _features_from_subscription(user.active_subscription)
     return user
 
 
 # Role-based authorization
+@functools.lru_cache(maxsize=None)
 def require_role(*allowed_roles: str):
     """
     Dependency factory for role-based authorization.
@@ -176,14 +392,16 @@ def require_role(*allowed_roles: str):
         *allowed_roles: List of allowed roles (e.g., "sailor", "coach", "admin")
 
     Returns:
-        Dependency function that validates user role
+        Dependency function that validates user role (memoized per role tuple)
     """
+    roles = frozenset(allowed_roles)
+    detail = f"Access denied. Required role: {', '.join(allowed_roles)}"
+
+    denied = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
     def role_checker(user: User = Depends(get_current_user)) -> User:
-        if user.role not in allowed_roles:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Access denied. Required role: {', '.join(allowed_roles)}"
-            )
+        if user.role not in roles:
+            raise denied.with_traceback(None)
         return user
 
     return role_checker
@@ -204,11 +422,18 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """
     user = db.query(User).filter(User.email == email).first()
     if not user:
+        # Burn the same hashing cost so unknown emails can't be told apart by timing
+        pwd_context.dummy_verify()
         return None
 
     if not verify_password(password, user.password_hash):
         return None
 
+    # Transparently migrate legacy bcrypt hashes to the preferred scheme
+    if pwd_context.needs_update(user.password_hash):
+        user.password_hash = hash_password(password)
+        db.commit()
+
     return user
 
 
@@ -262,15 +487,10 @@ def can_edit_user(current_user: User, target_user: User) -> bool:
     Returns:
         True if edit is allowed, False otherwise
     """
-    # Users can edit themselves
-    if current_user.id == target_user.id:
-        return True
-
-    # Admins can edit users in their club
-    if current_user.role == "admin" and current_user.club_id == target_user.club_id:
-        return True
-
-    return False
+    # Users can edit themselves; admins can edit users in their club
+    return current_user.id == target_user.id or (
+        current_user.role == "admin" and current_user.club_id == target_user.club_id
+    )
 
 
 def can_view_session(current_user: User, session_club_id: int, session_user_id: int) -> bool:
@@ -294,22 +514,63 @@ def can_view_session(current_user: User, session_club_id: int, session_user_id:
     if current_user.club_id != session_club_id:
         return False
 
-    # Users can view their own sessions
-    if current_user.id == session_user_id:
-        return True
+    # Users can view their own sessions; coaches and admins can view all
+    # sessions in their club
+    return current_user.id == session_user_id or current_user.role in _ELEVATED_ROLES
 
-    # Coaches and admins can view all sessions in their club
-    if current_user.role in ["coach", "admin"]:
-        return True
 
-    return False
+# Subscription-based authorization
+SUBSCRIPTION_CACHE_TTL_SECONDS = 60
+_features_cache = TTLCache(maxsize=10000, ttl=SUBSCRIPTION_CACHE_TTL_SECONDS)
+_features_cache_lock = threading.Lock()
 
+_FEATURE_KEYS = ("subscribed", "plan", "max_sessions", "ai_coaching", "fleet_replay", "wind_analysis")
+_FREE_FEATURES = (False, "free", 5, False, False, False)
 
-# Subscription-based authorization
-def get_user_subscription_features(user: User, db: Session) -> dict:
+
+def _features_from_subscription(subscription) -> tuple:
+    """Map an active Subscription row (or None) to a feature tuple."""
+    if subscription and subscription.plan_id in ["pro_monthly", "club_monthly"]:
+        # Pro or Club subscription - unlimited features
+        return (True, subscription.plan_id, -1, True, True, True)
+    # Free tier - limited features
+    return _FREE_FEATURES
+
+
+def _features_for_user(user_id: int, db: Session) -> tuple:
+    """Resolve a user's feature tuple (ordered as _FEATURE_KEYS), cached per user."""
+    with _features_cache_lock:
+        cached = _features_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    from app.db.models import Subscription
+
+    # Check for active subscription
+    subscription = db.query(Subscription).filter(
+        Subscription.user_id == user_id,
+        Subscription.status == "active"
+    ).first()
+    features = _features_from_subscription(subscription)
+
+    with _features_cache_lock:
+        _features_cache[user_id] = features
+    return features
+
+
+def invalidate_subscription(user_id: int) -> None:
+    """Drop a user's cached subscription features (call on any subscription change)."""
+    with _features_cache_lock:
+        _features_cache.pop(user_id, None)
+
+
+def get_user_subscription_features(user: User, db: Session, request: Optional[Request] = None) -> dict:
     """
     Get the subscription features available to a user.
 
+    When a request is given, the result is memoized on request.state so
+    several gates in one request resolve features once.
+
     Returns dict with:
     - subscribed: bool
     - plan: str
@@ -318,34 +579,16 @@ def get_user_subscription_features(user: User, db: Session) -> dict:
     - fleet_replay: bool
     - wind_analysis: bool
     """
-    from app.db.models import Subscription
+    if request is not None:
+        features = getattr(request.state, "features", None)
+        if features is not None:
+            return features
 
-    # Check for active subscription
-    subscription = db.query(Subscription).filter(
-        Subscription.user_id == user.id,
-        Subscription.status == "active"
-    ).first()
+    features = dict(zip(_FEATURE_KEYS, _features_for_user(user.id, db)))
 
-    if subscription and subscription.plan in ["pro_monthly", "club_monthly"]:
-        # Pro or Club subscription - unlimited features
-        return {
-            "subscribed": True,
-            "plan": subscription.plan,
-            "max_sessions": -1,  # Unlimited
-            "ai_coaching": True,
-            "fleet_replay": True,
-            "wind_analysis": True
-        }
-
-    # Free tier - limited features
-    return {
-        "subscribed": False,
-        "plan": "free",
-        "max_sessions": 5,
-        "ai_coaching": False,
-        "fleet_replay": False,
-        "wind_analysis": False
-    }
+    if request is not None:
+        request.state.features = features
+    return features
 
 
 def require_subscription(feature: str = None):
@@ -363,10 +606,11 @@ def require_subscription(feature: str = None):
             ...
     """
     def subscription_checker(
-        user: User = Depends(get_current_user),
+        request: Request,
+        user: User = Depends(get_current_user_with_subscription),
         db: Session = Depends(get_db)
     ) -> User:
-        features = get_user_subscription_features(user, db)
+        features = get_user_subscription_features(user, db, request)
 
         if not features["subscribed"]:
             raise HTTPException(
@@ -386,7 +630,7 @@ def require_subscription(feature: str = None):
     return subscription_checker
 
 
-def check_session_limit(user: User, db: Session):
+def check_session_limit(user: User, db: Session, request: Optional[Request] = None):
     """
     Check if user has exceeded their monthly session limit.
     Raises HTTPException if limit exceeded.
@@ -399,7 +643,7 @@ def check_session_limit(user: User, db: Session):
     # TEMPORARY: Bypass session limit during development
     return
 
-    features = get_user_subscription_features(user, db)
+    features = get_user_subscription_features(user, db, request)
 
     # Unlimited sessions for subscribed users
     if features["max_sessions"] == -1:
@@ -409,7 +653,7 @@ def check_session_limit(user: User, db: Session):
     month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     session_count = db.query(DbSession).filter(
         DbSession.user_id == user.id,
-        DbSession.created_at >= month_start
+        DbSession.start_ts >= month_start
     ).count()
 
     if session_count >= features["max_sessions"]:
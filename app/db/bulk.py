@@ -0,0 +1,66 @@
+"""
+Bulk insert helpers for high-volume telemetry tables.
+
+PostgreSQL rows are streamed with COPY; other databases use a single
+executemany INSERT per chunk.
+"""
+
+import csv
+import io
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.orm import Session
+
+from app.db.models import TrackPoint
+
+# Gains flatten out past a few thousand rows per round-trip
+BULK_CHUNK_SIZE = 5000
+
+TRACKPOINT_COLUMNS = ("session_id", "ts", "ts_us", "lat", "lon", "sog", "cog", "awa", "aws", "hdg", "tws", "twa")
+
+
+def _chunks(rows: Sequence[dict], size: int) -> Iterable[Sequence[dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _copy_rows(db: Session, table: Table, columns: Sequence[str], rows: Sequence[dict]) -> None:
+    """Stream rows into a PostgreSQL table with COPY ... FROM STDIN (CSV)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        # Empty unquoted CSV fields load as NULL
+        writer.writerow(["" if row.get(c) is None else row.get(c) for c in columns])
+    buf.seek(0)
+
+    dbapi_conn = db.connection().connection
+    with dbapi_conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+
+
+def bulk_insert(db: Session, table: Table, columns: Sequence[str], rows: List[dict],
+                chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    Insert many rows into a table inside the session's transaction.
+
+    The caller commits. Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+
+    use_copy = db.get_bind().dialect.name == "postgresql"
+    for chunk in _chunks(rows, chunk_size):
+        if use_copy:
+            _copy_rows(db, table, columns, chunk)
+        else:
+            db.execute(table.insert(), list(chunk))
+    return len(rows)
+
+
+def bulk_insert_trackpoints(db: Session, rows: List[dict], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """Insert TrackPoint rows given as dicts keyed by TRACKPOINT_COLUMNS."""
+    return bulk_insert(db, TrackPoint.__table__, TRACKPOINT_COLUMNS, rows, chunk_size)
@@ -1,15 +1,109 @@
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime, ForeignKey, JSON, Boolean
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy import create_engine, event, inspect, text, Index, Column, Integer, BigInteger, Float, String, DateTime, ForeignKey, JSON, Boolean, LargeBinary
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declarative_base, deferred, relationship, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 import os
+import zlib
+import orjson
 from datetime import datetime
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./racepilot.db")
+
+# JSON columns are encoded with orjson; numpy arrays/scalars and int dict keys
+# (e.g. per-bin stats) serialize directly without a .tolist() round trip
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _json_dumps(value) -> str:
+    return orjson.dumps(value, option=_ORJSON_OPTS).decode()
+
+
+_JSON_ENGINE_KWARGS = {"json_serializer": _json_dumps, "json_deserializer": orjson.loads}
+
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    if ":memory:" in DATABASE_URL or DATABASE_URL in ("sqlite://", "sqlite:///"):
+        # In-memory DB only exists on a single connection, so share it
+        engine = create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+            **_JSON_ENGINE_KWARGS,
+        )
+    else:
+        engine = create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            **_JSON_ENGINE_KWARGS,
+        )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers proceed while a writer holds the lock, and with
+        # synchronous=NORMAL commits no longer fsync individually
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        cursor.close()
 else:
-    engine = create_engine(DATABASE_URL)
-
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=QueuePool,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        **_JSON_ENGINE_KWARGS,
+    )
+
+# JSON everywhere, stored as binary JSONB on Postgres (parsed once on write)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON stored as zlib-compressed bytes, for the large analysis metadata blobs.
+
+    Postgres keeps plain JSONB: values over ~2KB are already compressed by
+    TOAST, and JSONB stays queryable. Rows written before the switch hold
+    plain JSON text, which is still read back as-is.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        return zlib.compress(orjson.dumps(value, option=_ORJSON_OPTS))
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        if isinstance(value, str):
+            return orjson.loads(value)
+        try:
+            return orjson.loads(zlib.decompress(value))
+        except zlib.error:
+            return orjson.loads(value)
+
+# Loader strategy for relationships that are not eager by design. With
+# RACEPILOT_ORM_RAISE=1 (dev) an implicit lazy load raises instead of
+# silently issuing a query, so N+1 patterns surface; routes opt in with
+# selectinload()/joinedload().
+LAZY = "raise_on_sql" if os.getenv("RACEPILOT_ORM_RAISE") == "1" else "select"
+
+# Objects keep their loaded state after commit(); handlers that need
+# DB-generated values back call db.refresh(obj) explicitly
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
 Base = declarative_base()
 
 class Club(Base):
@@ -19,7 +113,7 @@ class Club(Base):
     code = Column(String, unique=True, nullable=False, index=True)  # e.g., "BRYC"
     subscription_tier = Column(String, default='free')  # 'free', 'basic', 'pro'
     created_at = Column(DateTime, default=datetime.utcnow)
-    settings = Column(JSON, nullable=True)
+    settings = Column(JSONType, nullable=True)
     is_active = Column(Boolean, default=True)
 
     # Privacy settings
@@ -45,6 +139,16 @@ class User(Base):
     last_login = Column(DateTime, nullable=True)
     is_active = Column(Boolean, default=True)
 
+    boats = relationship("Boat", back_populates="user", lazy=LAZY, passive_deletes=True)
+
+    # Current active subscription (read-only; writes go through Subscription)
+    active_subscription = relationship(
+        "Subscription",
+        primaryjoin="and_(User.id == Subscription.user_id, Subscription.status == 'active')",
+        uselist=False,
+        viewonly=True,
+    )
+
 class BoatClass(Base):
     __tablename__ = "boat_classes"
 
@@ -85,6 +189,8 @@ class BoatClass(Base):
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    boats = relationship("Boat", back_populates="boat_class")
+
 class Boat(Base):
     __tablename__ = "boats"
     id = Column(Integer, primary_key=True)
@@ -96,8 +202,9 @@ class Boat(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     is_default = Column(Boolean, default=False)
 
-    # Relationship
-    boat_class = relationship("BoatClass", backref="boats")
+    # Relationships
+    user = relationship("User", back_populates="boats", lazy=LAZY)
+    boat_class = relationship("BoatClass", back_populates="boats")
 
 class Session(Base):
     __tablename__ = "sessions"
@@ -111,11 +218,22 @@ class Session(Base):
     end_ts = Column(DateTime, nullable=True)
     notes = Column(String, nullable=True)
 
+    # Relationships (passive_deletes: child rows are never touched on session delete)
+    trackpoints = relationship("TrackPoint", back_populates="session", lazy=LAZY, passive_deletes=True)
+    maneuvers = relationship("Maneuver", back_populates="session", lazy=LAZY, passive_deletes=True)
+    weather = relationship("WeatherData", back_populates="session", lazy=LAZY, passive_deletes=True)
+
+    __table_args__ = (
+        # Per-user sessions in a time window (monthly session limit, history lists)
+        Index("ix_sessions_user_start", "user_id", "start_ts"),
+    )
+
 class TrackPoint(Base):
     __tablename__ = "trackpoints"
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
-    ts = Column(DateTime, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"))
+    ts = Column(DateTime)
+    ts_us = Column(BigInteger, nullable=True)  # ts as UTC epoch microseconds, for numeric reads
     lat = Column(Float)
     lon = Column(Float)
     sog = Column(Float)  # speed over ground (kn)
@@ -126,11 +244,22 @@ class TrackPoint(Base):
     tws = Column(Float, nullable=True)  # true wind speed (kn)
     twa = Column(Float, nullable=True)  # true wind angle (deg)
 
+    session = relationship("Session", back_populates="trackpoints", lazy=LAZY)
+
+    __table_args__ = (
+        # Ordered/ranged reads of a single session's track
+        Index("ix_trackpoints_session_ts", "session_id", "ts"),
+    )
+
 class Polar(Base):
     __tablename__ = "polars"
     id = Column(Integer, primary_key=True)
     boat_id = Column(Integer, ForeignKey("boats.id"))
-    data_json = Column(JSON)  # {'tws_kn': [...], 'twa_deg': [...], 'target_kn': [[...]]}
+    # Legacy/interchange form; reads use the packed float32 blobs below
+    data_json = deferred(Column(JSONType))  # {'tws_kn': [...], 'twa_deg': [...], 'target_kn': [[...]]}
+    tws_blob = Column(LargeBinary, nullable=True)  # float32[n_tws]
+    twa_blob = Column(LargeBinary, nullable=True)  # float32[n_twa]
+    target_blob = Column(LargeBinary, nullable=True)  # float32[n_tws * n_twa], row-major
 
 class RaceCourse(Base):
     __tablename__ = "race_courses"
@@ -139,7 +268,9 @@ class RaceCourse(Base):
     description = Column(String, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime)
-    config_json = Column(JSON)  # {'type': 'windward_leeward', 'laps': 3, etc.}
+    config_json = deferred(Column(JSONType))  # {'type': 'windward_leeward', 'laps': 3, etc.}
+
+    marks = relationship("RaceMark", back_populates="course", lazy=LAZY, passive_deletes=True)
 
 class RaceMark(Base):
     __tablename__ = "race_marks"
@@ -153,11 +284,13 @@ class RaceMark(Base):
     sequence = Column(Integer)  # Order in course
     shape = Column(String, default='circle')  # 'circle', 'triangle', 'square', 'pin'
 
+    course = relationship("RaceCourse", back_populates="marks", lazy=LAZY)
+
 class WeatherData(Base):
     __tablename__ = "weather_data"
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), index=True, nullable=True)
-    ts = Column(DateTime, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=True)
+    ts = Column(DateTime)
     lat = Column(Float)
     lon = Column(Float)
     wind_speed = Column(Float)  # knots
@@ -167,15 +300,25 @@ class WeatherData(Base):
     current_speed = Column(Float, nullable=True)  # knots
     current_direction = Column(Float, nullable=True)  # degrees
 
+    session = relationship("Session", back_populates="weather", lazy=LAZY)
+
+    __table_args__ = (
+        Index("ix_weather_data_session_ts", "session_id", "ts"),
+    )
+
 class TacticalEvent(Base):
     __tablename__ = "tactical_events"
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"))
     ts = Column(DateTime)
     lat = Column(Float)
     lon = Column(Float)
     event_type = Column(String)  # 'tack', 'gybe', 'mark_rounding', 'start', 'finish'
-    metadata_json = Column(JSON, nullable=True)  # Additional event data
+    metadata_json = Column(JSONType, nullable=True)  # Additional event data
+
+    __table_args__ = (
+        Index("ix_tactical_events_session_ts", "session_id", "ts"),
+    )
 
 class StartLine(Base):
     __tablename__ = "start_lines"
@@ -192,10 +335,10 @@ class StartLine(Base):
 class Maneuver(Base):
     __tablename__ = "maneuvers"
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
-    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"))
+    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True)
     maneuver_type = Column(String)  # 'tack', 'gybe', 'turn'
-    start_ts = Column(DateTime, index=True)
+    start_ts = Column(DateTime)
     end_ts = Column(DateTime)
     angle_change_deg = Column(Float)
     entry_sog_kn = Column(Float)
@@ -208,7 +351,13 @@ class Maneuver(Base):
     end_lat = Column(Float)
     end_lon = Column(Float)
     twd = Column(Float, nullable=True)  # True wind direction at time of maneuver
-    detection_params = Column(JSON, nullable=True)  # Store detection parameters used
+    detection_params = deferred(Column(JSONType, nullable=True))  # Store detection parameters used
+
+    session = relationship("Session", back_populates="maneuvers", lazy=LAZY)
+
+    __table_args__ = (
+        Index("ix_maneuvers_session_start", "session_id", "start_ts"),
+    )
 
 class PerformanceBaseline(Base):
     __tablename__ = "performance_baselines"
@@ -227,10 +376,10 @@ class PerformanceBaseline(Base):
 class PerformanceAnomaly(Base):
     __tablename__ = "performance_anomalies"
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
-    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"))
+    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True)
     trackpoint_id = Column(Integer, ForeignKey("trackpoints.id"), nullable=True)
-    ts = Column(DateTime, index=True)
+    ts = Column(DateTime)
     lat = Column(Float)
     lon = Column(Float)
     actual_sog = Column(Float)  # Actual speed
@@ -238,10 +387,14 @@ class PerformanceAnomaly(Base):
     deviation_kts = Column(Float)  # How much slower/faster
     z_score = Column(Float)  # Statistical significance
     severity = Column(String)  # 'minor', 'moderate', 'severe'
-    possible_causes = Column(JSON)  # List of likely explanations
+    possible_causes = Column(JSONType)  # List of likely explanations
     wind_speed = Column(Float, nullable=True)
     wind_angle = Column(Float, nullable=True)
 
+    __table_args__ = (
+        Index("ix_performance_anomalies_session_ts", "session_id", "ts"),
+    )
+
 class FleetComparison(Base):
     __tablename__ = "fleet_comparisons"
     id = Column(Integer, primary_key=True)
@@ -249,7 +402,7 @@ class FleetComparison(Base):
     session_b_id = Column(Integer, ForeignKey("sessions.id"), index=True)
     boat_a_id = Column(Integer, ForeignKey("boats.id"))
     boat_b_id = Column(Integer, ForeignKey("boats.id"))
-    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True, index=True)
+    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True)
     comparison_ts = Column(DateTime, index=True)
 
     # Speed comparison
@@ -275,7 +428,7 @@ class FleetComparison(Base):
     # Overall metrics
     winner = Column(String)  # 'boat_a', 'boat_b', or 'tie'
     performance_gap_percent = Column(Float)  # Overall performance difference
-    comparison_metadata = Column(JSON, nullable=True)
+    comparison_metadata = deferred(Column(CompressedJSON, nullable=True))
 
 class VMGOptimization(Base):
     __tablename__ = "vmg_optimizations"
@@ -299,14 +452,14 @@ class VMGOptimization(Base):
     model_version = Column(String, default="v1")
     training_accuracy = Column(Float, nullable=True)  # R² score
     last_trained = Column(DateTime)
-    training_metadata = Column(JSON, nullable=True)  # Store model parameters
+    training_metadata = deferred(Column(CompressedJSON, nullable=True))  # Store model parameters
 
 class CoachingRecommendation(Base):
     __tablename__ = "coaching_recommendations"
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
-    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True, index=True)
-    ts = Column(DateTime, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"))
+    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True)
+    ts = Column(DateTime)
     lat = Column(Float)
     lon = Column(Float)
 
@@ -317,20 +470,24 @@ class CoachingRecommendation(Base):
     confidence_score = Column(Integer)  # 0-100, how confident the AI is
 
     # Context and analysis
-    context_data = Column(JSON)  # Factors considered: current TWA, VMG, wind conditions, position, etc.
+    context_data = deferred(Column(CompressedJSON))  # Factors considered: current TWA, VMG, wind conditions, position, etc.
     reasoning = Column(String, nullable=True)  # Why this recommendation was made
 
     # Tracking effectiveness
     was_followed = Column(Integer, nullable=True)  # 1=yes, 0=no, null=unknown
-    outcome_data = Column(JSON, nullable=True)  # Measure recommendation effectiveness
+    outcome_data = deferred(Column(CompressedJSON, nullable=True))  # Measure recommendation effectiveness
     dismissed = Column(Integer, default=0)  # User dismissed this recommendation
 
+    __table_args__ = (
+        Index("ix_coaching_recommendations_session_ts", "session_id", "ts"),
+    )
+
 class WindShift(Base):
     __tablename__ = "wind_shifts"
     id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
-    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True, index=True)
-    start_ts = Column(DateTime, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"))
+    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True)
+    start_ts = Column(DateTime)
     end_ts = Column(DateTime)
 
     # Shift characteristics
@@ -347,13 +504,17 @@ class WindShift(Base):
 
     # Pattern analysis
     oscillation_period = Column(Float, nullable=True)  # Minutes between oscillations (if oscillating)
-    pattern_metadata = Column(JSON, nullable=True)  # Additional pattern data
+    pattern_metadata = deferred(Column(CompressedJSON, nullable=True))  # Additional pattern data
+
+    __table_args__ = (
+        Index("ix_wind_shifts_session_start", "session_id", "start_ts"),
+    )
 
 class WindPattern(Base):
     __tablename__ = "wind_patterns"
     id = Column(Integer, primary_key=True)
     session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
-    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True, index=True)
+    club_id = Column(Integer, ForeignKey("clubs.id"), nullable=True)
     analyzed_at = Column(DateTime)
 
     # Overall pattern classification
@@ -373,7 +534,7 @@ class WindPattern(Base):
     total_shifts_detected = Column(Integer)
     avg_shift_magnitude = Column(Float)
     wind_stability_score = Column(Float)  # 0-100, higher = more stable
-    analysis_metadata = Column(JSON, nullable=True)
+    analysis_metadata = deferred(Column(CompressedJSON, nullable=True))
 
 class Challenge(Base):
     __tablename__ = "challenges"
@@ -401,6 +562,23 @@ class Challenge(Base):
     attempt_count = Column(Integer, default=0)  # Number of attempts
     best_time = Column(Float, nullable=True)  # Best time in seconds vs ghost
 
+    # Relationships
+    creator = relationship("User", lazy=LAZY)
+    attempts = relationship("ChallengeAttempt", back_populates="challenge", lazy=LAZY, passive_deletes=True)
+
+    __table_args__ = (
+        # Public challenge feed, newest first. Partial so it only covers the
+        # (few) public rows; expiry is checked per row as now() can't be
+        # part of an index predicate.
+        Index(
+            "ix_challenges_public_created",
+            "created_at",
+            "expires_at",
+            postgresql_where=text("is_public"),
+            sqlite_where=text("is_public"),
+        ),
+    )
+
 class ChallengeAttempt(Base):
     __tablename__ = "challenge_attempts"
     id = Column(Integer, primary_key=True)
@@ -418,6 +596,10 @@ class ChallengeAttempt(Base):
     submitted_at = Column(DateTime, default=datetime.utcnow, index=True)
     xp_earned = Column(Integer, default=0)  # XP earned from this attempt
 
+    # Relationships
+    challenge = relationship("Challenge", back_populates="attempts", lazy=LAZY)
+    user = relationship("User", lazy=LAZY)
+
 class Video(Base):
     __tablename__ = "videos"
     id = Column(Integer, primary_key=True)
@@ -473,10 +655,15 @@ class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
-    token = Column(String, unique=True, nullable=False, index=True)
+    token = Column(LargeBinary(32), unique=True, nullable=False, index=True)  # sha256 digest of the emailed token
     expires_at = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     used_at = Column(DateTime, nullable=True)  # Track if token was used
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Create any tables missing from the database (no-op once the schema exists)"""
+    existing = set(inspect(engine).get_table_names())
+    missing = [table for name, table in Base.metadata.tables.items() if name not in existing]
+    if not missing:
+        return
+    Base.metadata.create_all(bind=engine, tables=missing)
@@ -0,0 +1,59 @@
+"""
+Per-request SQL statement counting (dev guardrail against N+1 regressions).
+
+Enabled with RACEPILOT_QUERY_COUNT=1. Each response then carries an
+X-DB-Queries header, and requests issuing more than RACEPILOT_QUERY_LIMIT
+statements are logged.
+"""
+
+import logging
+import os
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.db.models import engine
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_ENABLED = os.getenv("RACEPILOT_QUERY_COUNT") == "1"
+QUERY_LIMIT = int(os.getenv("RACEPILOT_QUERY_LIMIT", "20"))
+
+# Mutable holder so counts made in threadpool copies of the context
+# (sync endpoints) are visible to the middleware
+_statements: ContextVar[Optional[List[str]]] = ContextVar("db_statements", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = _statements.get()
+    if statements is not None:
+        statements.append(statement)
+
+
+class QueryCountMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        statements: List[str] = []
+        token = _statements.set(statements)
+        try:
+            response = await call_next(request)
+        finally:
+            _statements.reset(token)
+
+        request.state.query_count = len(statements)
+        response.headers["X-DB-Queries"] = str(len(statements))
+        if len(statements) > QUERY_LIMIT:
+            logger.warning(
+                "%s %s issued %d queries (limit %d); first: %r",
+                request.method, request.url.path, len(statements), QUERY_LIMIT, statements[0][:120],
+            )
+        return response
+
+
+def install(app) -> None:
+    """Attach the statement listener and middleware when enabled."""
+    if not QUERY_COUNT_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _count_statement)
+    app.add_middleware(QueryCountMiddleware)
@@ -1,12 +1,230 @@
 import os
-from typing import Optional
+from urllib.parse import quote
+import asyncio
+import random
+from typing import List, Optional, Protocol, Tuple
 import httpx
+import jinja2
+import logging
+import orjson
 
 # Email configuration from environment variables
 RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
 FROM_EMAIL = os.getenv("FROM_EMAIL", "RacePilot <info@race-pilot.app>")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://race-pilot.app")
 
+logger = logging.getLogger(__name__)
+
+# Links built from FRONTEND_URL, computed once
+DASHBOARD_URL = f"{FRONTEND_URL}/dashboard"
+RESET_URL_BASE = f"{FRONTEND_URL}/reset-password?token="
+
+# Email bodies live in app/email_templates and are compiled once at import;
+# HTML templates autoescape user-supplied values (names, club names)
+_templates = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.join(os.path.dirname(__file__), "email_templates")),
+    autoescape=jinja2.select_autoescape(["html"]),
+    auto_reload=False,
+    keep_trailing_newline=True,
+)
+# Constant for the process lifetime, so bound once rather than passed per render
+_templates.globals["frontend_url"] = FRONTEND_URL
+_templates.globals["dashboard_url"] = DASHBOARD_URL
+_WELCOME_HTML = _templates.get_template("welcome.html")
+_WELCOME_TEXT = _templates.get_template("welcome.txt")
+_RESET_HTML = _templates.get_template("reset.html")
+_RESET_TEXT = _templates.get_template("reset.txt")
+
+RESEND_API_URL = "https://api.resend.com/emails"
+RESEND_BATCH_URL = "https://api.resend.com/emails/batch"
+
+# Connection pool sizing for the Resend client
+EMAIL_POOL_SIZE = int(os.getenv("EMAIL_POOL_SIZE", "20"))
+EMAIL_MAX_CONNECTIONS = int(os.getenv("EMAIL_MAX_CONNECTIONS", "50"))
+
+# HTTP/2 multiplexes concurrent sends over one connection; needs the h2 package
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# One long-lived HTTP client so the TCP+TLS connection to Resend is reused
+# across emails instead of being re-established for every send.
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_lock = asyncio.Lock()
+
+
+async def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared Resend client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        async with _http_client_lock:
+            if _http_client is None or _http_client.is_closed:
+                _http_client = httpx.AsyncClient(
+                    http2=_HTTP2,
+                    timeout=10.0,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=EMAIL_POOL_SIZE,
+                        max_connections=EMAIL_MAX_CONNECTIONS,
+                        keepalive_expiry=60.0,
+                    ),
+                    headers={
+                        "Authorization": f"Bearer {RESEND_API_KEY}",
+                        "Content-Type": "application/json",
+                    },
+                )
+    return _http_client
+
+
+async def close_email_client():
+    """Close the shared Resend client (call on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+class TokenBucket:
+    """Async token-bucket rate limiter: `rate` tokens/second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def take(self, n: float = 1):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._last is not None:
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < n:
+                wait = (n - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+                self._last = now + wait
+                self._tokens = 0
+            else:
+                self._tokens -= n
+
+
+# Client-side throttle so bursts wait in-process instead of earning 429s
+# (Resend's default account limit is 2 requests/second)
+EMAIL_RATE_PER_SEC = float(os.getenv("EMAIL_RATE_PER_SEC", "2"))
+_resend_bucket = TokenBucket(EMAIL_RATE_PER_SEC)
+
+
+class ResendError(Exception):
+    """Non-success response from the Resend API (body truncated for logging)."""
+
+    def __init__(self, status_code: int, body: bytes):
+        self.status_code = status_code
+        self.body = body[:512]
+        super().__init__(f"Resend API error {status_code}: {self.body.decode(errors='replace')}")
+
+
+def _read_resend_response(response: httpx.Response):
+    """Decode a Resend response body once; raise ResendError on failure statuses."""
+    body = response.content
+    if response.status_code >= 400:
+        raise ResendError(response.status_code, body)
+    return orjson.loads(body) if body else None
+
+
+# Transient Resend failures are retried with exponential backoff + jitter
+EMAIL_MAX_ATTEMPTS = 5
+_RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+_RETRY_BASE_DELAY = 0.5
+_RETRY_MAX_DELAY = 10.0
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    if response is not None and response.status_code == 429:
+        try:
+            return min(float(response.headers["Retry-After"]), _RETRY_MAX_DELAY)
+        except (KeyError, ValueError):
+            pass
+    return min(_RETRY_BASE_DELAY * 2 ** attempt, _RETRY_MAX_DELAY) + random.uniform(0, 0.25)
+
+
+async def _post_with_retry(client: httpx.AsyncClient, url: str, payload: bytes) -> httpx.Response:
+    """POST a prebuilt JSON body, retrying timeouts, connect errors and 408/429/5xx."""
+    for attempt in range(EMAIL_MAX_ATTEMPTS):
+        last_attempt = attempt == EMAIL_MAX_ATTEMPTS - 1
+        try:
+            await _resend_bucket.take()
+            # Content-Type is a client default; the body is sent as prebuilt bytes
+            response = await client.post(url, content=payload)
+        except (httpx.ConnectError, httpx.TimeoutException):
+            if last_attempt:
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+
+        if response.status_code not in _RETRY_STATUS or last_attempt:
+            return response
+        await asyncio.sleep(_retry_delay(attempt, response))
+
+
+def _resend_message(to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> dict:
+    return {
+        "from": FROM_EMAIL,
+        "to": [to_email],
+        "subject": subject,
+        "html": html_content,
+        "text": text_content or html_content,
+    }
+
+
+class Transport(Protocol):
+    """Delivery backend. Messages are dicts of send_email arguments."""
+
+    async def send(self, message: dict): ...
+
+    async def send_batch(self, messages: List[dict]): ...
+
+
+class ResendTransport:
+    """Delivers through the Resend HTTP API over the shared pooled client."""
+
+    async def send(self, message: dict):
+        client = await _get_http_client()
+        payload = orjson.dumps(_resend_message(**message))
+        result = _read_resend_response(await _post_with_retry(client, RESEND_API_URL, payload))
+        logger.info("Email sent to %s", message["to_email"])
+        return result
+
+    async def send_batch(self, messages: List[dict]):
+        client = await _get_http_client()
+        payload = orjson.dumps([_resend_message(**msg) for msg in messages])
+        result = _read_resend_response(await _post_with_retry(client, RESEND_BATCH_URL, payload))
+        logger.info("Batch of %d emails sent", len(messages))
+        return result
+
+
+class LogTransport:
+    """Development fallback when no RESEND_API_KEY is set: logs instead of sending."""
+
+    async def send(self, message: dict):
+        logger.info(
+            "Email not sent (no RESEND_API_KEY): to=%s subject=%s",
+            message["to_email"], message["subject"],
+        )
+        # Body (e.g. reset links for local testing) only with LOG_LEVEL=DEBUG
+        logger.debug(
+            "Email body for %s:\n%s",
+            message["to_email"], message.get("text_content") or message["html_content"],
+        )
+
+    async def send_batch(self, messages: List[dict]):
+        for message in messages:
+            await self.send(message)
+
+
+_transport: Transport = ResendTransport() if RESEND_API_KEY else LogTransport()
+
+
 async def send_email(
     to_email: str,
     subject: str,
@@ -19,202 +237,143 @@ async def send_email(
     For production: Set environment variable:
     - RESEND_API_KEY: Your Resend API key (get from https://resend.com)
     - FROM_EMAIL: Sender email (default: RacePilot <noreply@race-pilot.app>)
+
+    Without an API key the email is logged instead of sent.
     """
+    try:
+        return await _transport.send(dict(
+            to_email=to_email,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content,
+        ))
+    except Exception as e:
+        logger.error("Failed to send email to %s: %s", to_email, e)
+        # Don't raise - we don't want email failures to break registration
+        return None
 
-    # If no Resend API key, log the email instead of sending
-    if not RESEND_API_KEY:
-        print(f"""
-        ========== EMAIL (NOT SENT - NO RESEND API KEY) ==========
-        To: {to_email}
-        Subject: {subject}
 
-        {text_content or html_content}
-        ===========================================================
-        """)
-        return
+async def send_email_batch(messages: List[dict]):
+    """
+    Send several emails (each a dict of send_email arguments) in one
+    transport batch call. Falls back to individual sends if the batch is rejected.
+    """
+    if len(messages) == 1:
+        return await send_email(**messages[0])
 
-    # Send email via Resend API
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.resend.com/emails",
-                headers={
-                    "Authorization": f"Bearer {RESEND_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "from": FROM_EMAIL,
-                    "to": [to_email],
-                    "subject": subject,
-                    "html": html_content,
-                    "text": text_content or html_content,
-                },
-                timeout=10.0
-            )
-
-            if response.status_code != 200:
-                error_detail = response.text
-                print(f"Failed to send email to {to_email}: {error_detail}")
-                raise Exception(f"Resend API error: {error_detail}")
-
-            print(f"✅ Email sent successfully to {to_email}")
-            return response.json()
+        return await _transport.send_batch(messages)
     except Exception as e:
-        print(f"❌ Failed to send email to {to_email}: {e}")
-        # Don't raise - we don't want email failures to break registration
-        return None
+        logger.warning("Batch send of %d emails failed (%s), sending individually", len(messages), e)
+        for msg in messages:
+            await send_email(**msg)
+
+
+# Background delivery queue. Request handlers enqueue and return; worker
+# tasks started with the app drain the queue through send_email.
+MAIL_QUEUE_SIZE = 1000
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "4"))
+EMAIL_DRAIN_TIMEOUT = float(os.getenv("EMAIL_DRAIN_TIMEOUT", "10"))
+EMAIL_BATCH_SIZE = 100  # Resend batch endpoint limit
+EMAIL_BATCH_WINDOW = 0.05  # seconds to wait for more emails to join a batch
+_mail_queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=MAIL_QUEUE_SIZE)
+_mail_workers: List[asyncio.Task] = []
+
+
+async def _next_batch() -> List[dict]:
+    """Wait for one queued email, then gather any arriving within the batch window."""
+    batch = [await _mail_queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + EMAIL_BATCH_WINDOW
+    while len(batch) < EMAIL_BATCH_SIZE:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(_mail_queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+async def _mail_worker():
+    """Send queued emails, coalescing bursts into batch calls, until cancelled."""
+    while True:
+        batch = await _next_batch()
+        try:
+            await send_email_batch(batch)
+        except Exception:
+            logger.exception("Mail worker error for %d emails", len(batch))
+        finally:
+            for _ in batch:
+                _mail_queue.task_done()
+
+
+def _workers_running() -> bool:
+    return any(not task.done() for task in _mail_workers)
+
+
+def start_mail_worker():
+    """Start the background mail workers (call from app startup)."""
+    if _workers_running():
+        return
+    loop = asyncio.get_running_loop()
+    _mail_workers[:] = [loop.create_task(_mail_worker()) for _ in range(max(1, EMAIL_WORKERS))]
 
 
-async def send_welcome_email(email: str, name: str, club_name: str):
-    """Send welcome email to newly registered users"""
+async def stop_mail_worker():
+    """Let queued emails drain (up to EMAIL_DRAIN_TIMEOUT), then stop the workers."""
+    if _workers_running():
+        try:
+            await asyncio.wait_for(_mail_queue.join(), EMAIL_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Shutting down with %d emails still queued", _mail_queue.qsize())
 
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-            }}
-            .header {{
-                background: linear-gradient(135deg, #1e40af, #3b82f6);
-                color: white;
-                padding: 40px 20px;
-                text-align: center;
-                border-radius: 10px 10px 0 0;
-            }}
-            .logo {{
-                font-size: 48px;
-                margin-bottom: 10px;
-            }}
-            .content {{
-                background: #f8fafc;
-                padding: 40px 30px;
-                border-radius: 0 0 10px 10px;
-            }}
-            .button {{
-                display: inline-block;
-                background: #3b82f6;
-                color: white;
-                padding: 14px 30px;
-                text-decoration: none;
-                border-radius: 8px;
-                margin: 20px 0;
-                font-weight: bold;
-            }}
-            .features {{
-                background: white;
-                border-radius: 8px;
-                padding: 20px;
-                margin: 20px 0;
-            }}
-            .feature {{
-                margin: 15px 0;
-                padding-left: 30px;
-                position: relative;
-            }}
-            .feature:before {{
-                content: "⛵";
-                position: absolute;
-                left: 0;
-            }}
-            .footer {{
-                text-align: center;
-                margin-top: 30px;
-                color: #64748b;
-                font-size: 14px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <div class="logo">⛵</div>
-            <h1 style="margin: 0; font-size: 32px;">Welcome to RacePilot!</h1>
-            <p style="margin: 10px 0 0 0; opacity: 0.9;">Professional GPS Sailing Analytics</p>
-        </div>
-        <div class="content">
-            <h2>Hi {name},</h2>
-            <p>Welcome aboard! We're excited to have you join <strong>{club_name}</strong> on RacePilot.</p>
-
-            <p>Your account is now active and ready to start tracking your sailing sessions. Here's what you can do:</p>
-
-            <div class="features">
-                <div class="feature">
-                    <strong>Record Sessions:</strong> Download the mobile app and start capturing every tack, gybe, and mark rounding with 10Hz GPS precision
-                </div>
-                <div class="feature">
-                    <strong>Automatic Analysis:</strong> Our AI system automatically detects maneuvers and provides personalized coaching insights
-                </div>
-                <div class="feature">
-                    <strong>Fleet Comparison:</strong> Compare your sessions with club mates and learn from the fastest sailors
-                </div>
-                <div class="feature">
-                    <strong>Race Replay:</strong> Watch your races back on the web dashboard and identify exactly where you gained or lost positions
-                </div>
-            </div>
-
-            <p style="text-align: center;">
-                <a href="{FRONTEND_URL}/dashboard" class="button">Go to Dashboard</a>
-            </p>
-
-            <p style="margin-top: 30px;"><strong>Next Steps:</strong></p>
-            <ol>
-                <li>Download the RacePilot mobile app from Google Play</li>
-                <li>Sign in with your email: <strong>{email}</strong></li>
-                <li>Mount your GPS on the mast and start sailing!</li>
-                <li>View your sessions and analytics on the web dashboard</li>
-            </ol>
-
-            <p>If you have any questions or need help getting started, reply to this email or contact us at info@race-pilot.app.</p>
-
-            <p>Fair winds and following seas,<br>
-            <strong>The RacePilot Team</strong></p>
-        </div>
-        <div class="footer">
-            <p>RacePilot - Professional Sailing Race Analysis</p>
-            <p><a href="{FRONTEND_URL}" style="color: #3b82f6; text-decoration: none;">race-pilot.app</a> | <a href="mailto:info@race-pilot.app" style="color: #3b82f6; text-decoration: none;">info@race-pilot.app</a></p>
-        </div>
-    </body>
-    </html>
-    """
+    for task in _mail_workers:
+        task.cancel()
+    await asyncio.gather(*_mail_workers, return_exceptions=True)
+    _mail_workers.clear()
 
-    text_content = f"""
-    Welcome to RacePilot!
 
-    Hi {name},
+async def enqueue_email(**kwargs):
+    """
+    Queue an email for background delivery (same arguments as send_email).
 
-    Welcome aboard! We're excited to have you join {club_name} on RacePilot.
+    Never blocks: when the queue is full the oldest pending email is dropped.
+    If no workers are running (scripts, tests) the email is sent inline.
+    """
+    if not _workers_running():
+        await send_email(**kwargs)
+        return
 
-    Your account is now active and ready to start tracking your sailing sessions.
+    while True:
+        try:
+            _mail_queue.put_nowait(kwargs)
+            return
+        except asyncio.QueueFull:
+            try:
+                dropped = _mail_queue.get_nowait()
+                _mail_queue.task_done()
+                logger.warning("Mail queue full, dropped email to %s", dropped.get("to_email"))
+            except asyncio.QueueEmpty:
+                pass
 
-    What you can do:
-    - Record Sessions: Download the mobile app and start capturing every tack, gybe, and mark rounding
-    - Automatic Analysis: Our AI system detects maneuvers and provides coaching insights
-    - Fleet Comparison: Compare your sessions with club mates
-    - Race Replay: Watch your races back on the web dashboard
 
-    Next Steps:
-    1. Download the RacePilot mobile app from Google Play
-    2. Sign in with your email: {email}
-    3. Mount your GPS on the mast and start sailing!
-    4. View your sessions and analytics at {FRONTEND_URL}/dashboard
+def render_welcome(name: str, club_name: str, email: str) -> Tuple[str, str]:
+    """Render the welcome email as (html, text)"""
+    context = dict(name=name, club_name=club_name, email=email)
+    return _WELCOME_HTML.render(**context), _WELCOME_TEXT.render(**context)
 
-    Need help? Contact us at info@race-pilot.app
 
-    Fair winds and following seas,
-    The RacePilot Team
+def render_reset(reset_url: str) -> Tuple[str, str]:
+    """Render the password reset email as (html, text)"""
+    return _RESET_HTML.render(reset_url=reset_url), _RESET_TEXT.render(reset_url=reset_url)
 
-    ---
-    RacePilot - Professional Sailing Race Analysis
-    race-pilot.app
-    """
 
-    await send_email(
+async def send_welcome_email(email: str, name: str, club_name: str):
+    """Send welcome email to newly registered users"""
+    html_content, text_content = render_welcome(name, club_name, email)
+    await enqueue_email(
         to_email=email,
         subject=f"Welcome to RacePilot, {name}! 🎉",
         html_content=html_content,
@@ -224,95 +383,8 @@ async def send_welcome_email(email: str, name: str, club_name: str):
 
 async def send_password_reset_email(email: str, reset_token: str):
     """Send password reset email with token link"""
-
-    reset_url = f"{FRONTEND_URL}/reset-password?token={reset_token}"
-
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-            }}
-            .header {{
-                background: #1e40af;
-                color: white;
-                padding: 30px 20px;
-                text-align: center;
-                border-radius: 10px 10px 0 0;
-            }}
-            .content {{
-                background: #f8fafc;
-                padding: 30px;
-                border-radius: 0 0 10px 10px;
-            }}
-            .button {{
-                display: inline-block;
-                background: #3b82f6;
-                color: white;
-                padding: 14px 30px;
-                text-decoration: none;
-                border-radius: 8px;
-                margin: 20px 0;
-                font-weight: bold;
-            }}
-            .footer {{
-                text-align: center;
-                margin-top: 20px;
-                color: #64748b;
-                font-size: 14px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>⛵ RacePilot</h1>
-            <p>Password Reset Request</p>
-        </div>
-        <div class="content">
-            <h2>Reset Your Password</h2>
-            <p>We received a request to reset your password. Click the button below to create a new password:</p>
-
-            <a href="{reset_url}" class="button">Reset Password</a>
-
-            <p><strong>This link will expire in 1 hour.</strong></p>
-
-            <p>If you didn't request this password reset, you can safely ignore this email. Your password will not be changed.</p>
-
-            <p>Or copy and paste this link into your browser:</p>
-            <p style="word-break: break-all; color: #64748b;">{reset_url}</p>
-        </div>
-        <div class="footer">
-            <p>RacePilot - Professional Sailing Race Analysis</p>
-            <p>This is an automated email, please do not reply.</p>
-        </div>
-    </body>
-    </html>
-    """
-
-    text_content = f"""
-    RacePilot - Password Reset Request
-
-    We received a request to reset your password.
-
-    Click this link to reset your password:
-    {reset_url}
-
-    This link will expire in 1 hour.
-
-    If you didn't request this password reset, you can safely ignore this email.
-
-    ---
-    RacePilot - Professional Sailing Race Analysis
-    """
-
-    await send_email(
+    html_content, text_content = render_reset(RESET_URL_BASE + quote(reset_token, safe=""))
+    await enqueue_email(
         to_email=email,
         subject="Reset Your RacePilot Password",
         html_content=html_content,
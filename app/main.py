@@ -1,131 +1,150 @@
-from fastapi import FastAPI
+import asyncio
+import importlib
+import logging
+import os
+import orjson
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from .db.models import init_db, Base, engine
-from sqlalchemy import inspect
-
-# Try to load dotenv if available
-try:
-    from dotenv import load_dotenv
-    load_dotenv('.env.local')
-    load_dotenv()
-except ImportError:
-    # dotenv not installed, environment variables must be set manually
-    pass
-
-# Import routes individually with error handling
-try:
-    from .routes import auth
-    AUTH_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import auth routes: {e}")
-    auth = None
-    AUTH_AVAILABLE = False
-
-try:
-    from .routes import sessions
-    SESSIONS_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import sessions routes: {e}")
-    sessions = None
-    SESSIONS_AVAILABLE = False
-
-try:
-    from .routes import telemetry
-    TELEMETRY_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import telemetry routes: {e}")
-    telemetry = None
-    TELEMETRY_AVAILABLE = False
-
-try:
-    from .routes import analytics
-    ANALYTICS_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import analytics routes: {e}")
-    analytics = None
-    ANALYTICS_AVAILABLE = False
-
-try:
-    from .routes import ai
-    AI_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import ai routes: {e}")
-    ai = None
-    AI_AVAILABLE = False
-
-try:
-    from .routes import courses
-    COURSES_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import courses routes: {e}")
-    courses = None
-    COURSES_AVAILABLE = False
-
-try:
-    from .routes import clubs
-    CLUBS_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import clubs routes: {e}")
-    clubs = None
-    CLUBS_AVAILABLE = False
-
-try:
-    from .routes import challenges
-    CHALLENGES_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import challenges routes: {e}")
-    challenges = None
-    CHALLENGES_AVAILABLE = False
-
-try:
-    from .routes import videos
-    VIDEOS_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import videos routes: {e}")
-    videos = None
-    VIDEOS_AVAILABLE = False
-
-try:
-    from .routes import payments
-    PAYMENTS_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import payments routes: {e}")
-    payments = None
-    PAYMENTS_AVAILABLE = False
-
-try:
-    from .routes import boat_classes
-    BOAT_CLASSES_AVAILABLE = True
-except Exception as e:
-    print(f"Failed to import boat_classes routes: {e}")
-    boat_classes = None
-    BOAT_CLASSES_AVAILABLE = False
-
-app = FastAPI(title="RacePilot API", version="0.1.1")
-
-# Enable CORS for dashboard and mobile app
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173",  # Local development
-        "http://localhost:3000",  # Alternative local port
-        "https://racepilot-dashboard-production.up.railway.app",  # Production Railway
-        "https://racepilot-dashboard.vercel.app",  # Production Vercel (backup)
-        "https://racepilot-dashboard-k8upa8p5h-kevins-projects-5141f84d.vercel.app",  # Preview
-        "https://*.vercel.app",  # All Vercel preview deployments
-        "*"  # Mobile app support (consider restricting this later)
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.on_event("startup")
-def on_startup():
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from .db.models import init_db, Base, engine, SessionLocal, User, Club, Session
+from sqlalchemy import LargeBinary, insert, inspect, text
+
+# Load .env files in development only; in production (RACEPILOT_ENV=production)
+# the platform injects the environment and the file search is skipped
+if os.getenv("RACEPILOT_ENV", "dev") == "dev":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv('.env.local')
+        load_dotenv()
+    except ImportError:
+        # dotenv not installed, environment variables must be set manually
+        pass
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
+# Read config from the environment at import, so load after dotenv
+from .auth import require_role, hash_password, invalidate_user
+from .email_service import close_email_client, start_mail_worker, stop_mail_worker
+from .db import query_counter
+
+# Route modules and how they are mounted: name -> (prefix, tags).
+# They are imported when the app starts (see lifespan), not when this module
+# is imported, and RACEPILOT_ROUTES (comma-separated names) limits a process
+# to a subset, e.g. a telemetry-only worker that never loads Stripe or AI deps.
+_ROUTE_MODULES = {
+    "auth": ("/auth", ["auth"]),
+    "sessions": ("/sessions", ["sessions"]),
+    "telemetry": ("/telemetry", ["telemetry"]),
+    "analytics": ("/analytics", ["analytics"]),
+    "courses": ("/courses", ["courses"]),
+    "ai": ("/ai", ["ai"]),
+    "clubs": ("/clubs", ["clubs"]),
+    "challenges": ("", ["challenges"]),
+    "videos": ("", ["videos"]),
+    "payments": ("", None),
+    "boat_classes": ("/boat-classes", ["boat-classes"]),
+}
+
+
+def __getattr__(name):
+    """Lazily import route modules on attribute access (PEP 562), e.g. app.main.ai"""
+    if name in _ROUTE_MODULES:
+        return importlib.import_module(f".routes.{name}", __package__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _include_routes(app: FastAPI):
+    """Import and mount the enabled route modules, skipping any that fail to import. Returns the mounted names."""
+    loaded = []
+    enabled = os.getenv("RACEPILOT_ROUTES")
+    names = [n.strip() for n in enabled.split(",")] if enabled else list(_ROUTE_MODULES)
+
+    for name in names:
+        if name not in _ROUTE_MODULES:
+            print(f"Unknown route module in RACEPILOT_ROUTES: {name}")
+            continue
+        try:
+            module = importlib.import_module(f".routes.{name}", __package__)
+        except Exception as e:
+            print(f"Failed to import {name} routes: {e}")
+            continue
+
+        prefix, tags = _ROUTE_MODULES[name]
+        if tags is None:
+            app.include_router(module.router, prefix=prefix)
+        else:
+            app.include_router(module.router, prefix=prefix, tags=tags)
+        loaded.append(name)
+        print(f"[OK] {name} routes loaded")
+    return loaded
+
+# Schema DDL (create missing tables, add new columns) runs at startup
+# only when enabled: by default in dev, off with RACEPILOT_ENV=production.
+# Production deploys run it once via POST /migrate instead of on every boot.
+AUTO_MIGRATE = os.getenv(
+    "RACEPILOT_AUTO_MIGRATE", "1" if os.getenv("RACEPILOT_ENV", "dev") == "dev" else "0"
+) == "1"
+
+
+def _prepare_database():
     init_db()
+    _ensure_session_number()
+    _ensure_columns()
 
+
+def _ensure_columns():
+    """
+    Add the nullable columns newer models declare on existing tables, and
+    switch password_reset_tokens.token to a binary digest on PostgreSQL.
+
+    Only cheap DDL runs here; scripts/migrate_trackpoint_epoch.py and
+    scripts/migrate_polar_blobs.py backfill existing rows (readers fall back
+    to ts / data_json until then).
+    """
+    blob = "BYTEA" if engine.dialect.name == "postgresql" else "BLOB"
+    added_columns = {
+        "trackpoints": [("ts_us", "BIGINT")],
+        "polars": [("tws_blob", blob), ("twa_blob", blob), ("target_blob", blob)],
+    }
+    try:
+        inspector = inspect(engine)
+        tables = set(inspector.get_table_names())
+        with engine.begin() as conn:
+            for table, columns in added_columns.items():
+                if table not in tables:
+                    continue
+                existing = {c["name"] for c in inspector.get_columns(table)}
+                for name, ddl_type in columns:
+                    if name not in existing:
+                        print(f"Adding {table}.{name} column...")
+                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}"))
+
+            # Reset tokens are stored as SHA-256 digests. Outstanding tokens expire
+            # within an hour, so they are discarded rather than converted.
+            # (SQLite stores BLOBs in any column, so only PostgreSQL needs this.)
+            if engine.dialect.name == "postgresql" and "password_reset_tokens" in tables:
+                token_type = next(
+                    c["type"] for c in inspector.get_columns("password_reset_tokens") if c["name"] == "token"
+                )
+                if not isinstance(token_type, LargeBinary):
+                    print("Converting password_reset_tokens.token to BYTEA...")
+                    conn.execute(text("DELETE FROM password_reset_tokens"))
+                    conn.execute(text(
+                        "ALTER TABLE password_reset_tokens "
+                        "ALTER COLUMN token TYPE BYTEA USING convert_to(token, 'UTF8')"
+                    ))
+    except Exception as e:
+        print(f"Column migration error: {e}")
+
+
+def _ensure_session_number():
     # Add session_number column if it doesn't exist (migration)
-    from sqlalchemy import text
     try:
         with engine.connect() as conn:
             # Check if column exists
@@ -147,70 +166,154 @@ def on_startup():
     except Exception as e:
         print(f"Migration check error (might be using SQLite): {e}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loaded_routes = _include_routes(app)
+    if "ai" in loaded_routes:
+        # JIT-compile the maneuver kernel in the background (no-op without numba)
+        from .services import maneuver_kernels
+        threading.Thread(target=maneuver_kernels.warm_up, daemon=True).start()
+    if AUTO_MIGRATE:
+        # Blocking DB work runs in a worker thread so the event loop stays free
+        await asyncio.to_thread(_prepare_database)
+    start_mail_worker()
+    try:
+        yield
+    finally:
+        # Let queued emails drain, then close the pooled Resend connections
+        await stop_mail_worker()
+        await close_email_client()
+
+# The OpenAPI schema (and the docs pages that need it) is generated from
+# every route model on first request; production doesn't serve it
+_PRODUCTION = os.getenv("RACEPILOT_ENV", "dev") == "production"
+
+app = FastAPI(
+    title="RacePilot API",
+    version="0.1.1",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+    openapi_url=None if _PRODUCTION else "/openapi.json",
+    docs_url=None if _PRODUCTION else "/docs",
+    redoc_url=None if _PRODUCTION else "/redoc",
+)
+
+# Only compress bodies large enough to benefit (track/analytics payloads);
+# small responses such as /health skip it
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Enable CORS for dashboard and mobile app. Explicit origins/methods/headers
+# (a "*" origin can't be combined with credentials) and browsers may cache
+# preflight responses for a day.
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[
+        os.getenv("FRONTEND_URL", "https://race-pilot.app"),
+        "http://localhost:5173",  # Local development
+        "http://localhost:3000",  # Alternative local port
+        "https://racepilot-dashboard-production.up.railway.app",  # Production Railway
+        "capacitor://localhost",  # Mobile app (iOS webview)
+        "http://localhost",  # Mobile app (Android webview)
+    ],
+    # Vercel production and preview deployments of the dashboard project only
+    allow_origin_regex=r"https://racepilot-dashboard(-[a-z0-9-]+)?\.vercel\.app",
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
+)
+
+# Dev-only: per-request SQL statement counts (RACEPILOT_QUERY_COUNT=1)
+query_counter.install(app)
+
+_ROOT = {
+    "message": "RacePilot API is running",
+    "version": "0.1.1",
+    "status": "healthy"
+}
+_HEALTH = {"status": "healthy", "service": "racepilot-backend"}
+
 @app.get("/")
 def root():
-    return {
-        "message": "RacePilot API is running",
-        "version": "0.1.1",
-        "status": "healthy"
-    }
+    return _ROOT
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "racepilot-backend"}
+    return _HEALTH
 
-@app.post("/migrate")
-def run_migration():
-    """Run database migration to create AI feature tables."""
-    try:
-        inspector = inspect(engine)
-        existing_tables = inspector.get_table_names()
+# Serializes /migrate so concurrent calls don't race on DDL
+_migration_lock = threading.Lock()
 
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
+# Table names this process has already seen in the database (catalog read or
+# created by /migrate); reused so repeat calls skip the catalog query
+_known_tables = set()
+
+@app.post("/migrate")
+def run_migration(refresh: bool = False, admin=Depends(require_role("admin"))):
+    """
+    Run database migration: create missing tables and columns.
 
-        # Check which tables were created
-        new_tables = set(inspector.get_table_names()) - set(existing_tables)
+    Use ?refresh=true to re-read the table list from the database (e.g. after
+    tables were dropped outside the app).
+    """
+    if not _migration_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Migration already in progress")
+    try:
+        declared_tables = set(Base.metadata.tables)
+        if refresh or not declared_tables <= _known_tables:
+            _known_tables.clear()
+            _known_tables.update(inspect(engine).get_table_names())
+        existing_tables = set(_known_tables)
+
+        # Create only the declared tables that don't exist yet; the catalog was
+        # just read, so skip create_all's per-table existence checks
+        new_tables = declared_tables - existing_tables
+        if new_tables:
+            Base.metadata.create_all(
+                bind=engine,
+                tables=[Base.metadata.tables[name] for name in new_tables],
+                checkfirst=False,
+            )
+            _known_tables.update(new_tables)
+        _ensure_session_number()
+        _ensure_columns()
 
         return {
             "success": True,
             "message": "Migration completed successfully",
-            "tables_created": list(new_tables),
-            "total_tables": len(inspector.get_table_names())
+            "tables_created": sorted(new_tables),
+            "total_tables": len(existing_tables | declared_tables)
         }
     except Exception as e:
         return {
             "success": False,
             "error": str(e)
         }
+    finally:
+        _migration_lock.release()
+
+_INSERT_TEST_CLUB = text("""
+    INSERT INTO clubs (name, code, subscription_tier, is_active)
+    VALUES (:name, :code, 'free', :active)
+    ON CONFLICT (code) DO NOTHING
+    RETURNING id
+""").bindparams(name="Test Sailing Club", code="TEST", active=True)
+_SELECT_TEST_CLUB = text("SELECT id FROM clubs WHERE code = :code").bindparams(code="TEST")
 
 @app.post("/create-test-club")
 def create_test_club():
     """Create TEST club for development."""
-    from sqlalchemy import text
-    from datetime import datetime
-    from .db.models import SessionLocal
-
     db = SessionLocal()
     try:
-        # Check if TEST club exists
-        result = db.execute(text("SELECT id FROM clubs WHERE code = 'TEST'"))
-        existing = result.fetchone()
-
-        if existing:
-            return {"success": True, "message": "TEST club already exists", "club_id": existing[0]}
-
-        # Create TEST club
-        db.execute(text("""
-            INSERT INTO clubs (name, code, subscription_tier, is_active)
-            VALUES ('Test Sailing Club', 'TEST', 'free', 1)
-        """))
+        # Insert-if-missing in one statement (no SELECT/INSERT race)
+        row = db.execute(_INSERT_TEST_CLUB).fetchone()
         db.commit()
 
-        result = db.execute(text("SELECT id FROM clubs WHERE code = 'TEST'"))
-        club_id = result.fetchone()[0]
+        if row is None:
+            club_id = db.execute(_SELECT_TEST_CLUB).scalar_one()
+            return {"success": True, "message": "TEST club already exists", "club_id": club_id}
 
-        return {"success": True, "message": "TEST club created", "club_id": club_id}
+        return {"success": True, "message": "TEST club created", "club_id": row[0]}
     except Exception as e:
         db.rollback()
         return {"success": False, "error": str(e)}
@@ -226,10 +329,6 @@ def setup_admin():
     Creates Kevin Donnelly as admin user with predefined credentials.
     This is a one-time setup endpoint.
     """
-    from .db.models import SessionLocal, User, Club
-    from .auth import hash_password
-    from datetime import datetime
-
     db = SessionLocal()
     try:
         # Check if admin already exists
@@ -240,6 +339,7 @@ def setup_admin():
             existing_user.role = "admin"
             existing_user.password_hash = hash_password("worldwide123")
             db.commit()
+            invalidate_user(existing_user.id)
             return {
                 "success": True,
                 "message": "Admin user updated (role: admin, password: worldwide123)",
@@ -302,6 +402,18 @@ def setup_admin():
         db.close()
 
 
+# Columns written per table; password hashes are never included in backups
+_BACKUP_COLUMNS = {
+    "clubs": (Club, [
+        "id", "name", "code", "subscription_tier", "is_active", "privacy_level", "share_to_global",
+        "allow_anonymous_sharing", "description", "location", "website", "created_at",
+    ]),
+    "users": (User, [
+        "id", "email", "name", "club_id", "role", "sail_number", "is_active", "created_at", "last_login",
+    ]),
+}
+
+
 @app.get("/backup-database")
 def backup_database():
     """
@@ -309,69 +421,39 @@ def backup_database():
 
     Returns all users, clubs, sessions, and other data in JSON format
     that can be restored later if database is reset.
-    """
-    from .db.models import SessionLocal, User, Club
-    from datetime import datetime
 
-    db = SessionLocal()
-    try:
-        # Get all clubs
-        clubs = db.query(Club).all()
-        clubs_data = [
-            {
-                "id": club.id,
-                "name": club.name,
-                "code": club.code,
-                "subscription_tier": club.subscription_tier,
-                "is_active": club.is_active,
-                "privacy_level": club.privacy_level,
-                "share_to_global": club.share_to_global,
-                "allow_anonymous_sharing": club.allow_anonymous_sharing,
-                "description": club.description,
-                "location": club.location,
-                "website": club.website,
-                "created_at": club.created_at.isoformat() if club.created_at else None
-            }
-            for club in clubs
-        ]
-
-        # Get all users (excluding password hashes for security)
-        users = db.query(User).all()
-        users_data = [
-            {
-                "id": user.id,
-                "email": user.email,
-                "name": user.name,
-                "club_id": user.club_id,
-                "role": user.role,
-                "sail_number": user.sail_number,
-                "is_active": user.is_active,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-                "last_login": user.last_login.isoformat() if user.last_login else None
-            }
-            for user in users
-        ]
+    The body is streamed row by row (rows are fetched in batches), so memory
+    use stays flat however many users and clubs there are. "counts" comes
+    after "data" because it is only known once every row has been written.
 
-        return {
-            "success": True,
-            "backup_date": datetime.utcnow().isoformat(),
-            "counts": {
-                "clubs": len(clubs_data),
-                "users": len(users_data)
-            },
-            "data": {
-                "clubs": clubs_data,
-                "users": users_data
-            }
-        }
+    The 200 status is sent before the first row, so a failure part-way
+    through can only cut the body short: a truncated (unparseable) body
+    means the backup failed, and the error is in the server log.
+    """
+    db = SessionLocal()
 
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
-    finally:
-        db.close()
+    def _stream():
+        try:
+            counts = {}
+            yield b'{"success":true,"backup_date":' + orjson.dumps(datetime.utcnow().isoformat()) + b',"data":{'
+            for t, (name, (model, columns)) in enumerate(_BACKUP_COLUMNS.items()):
+                yield (b"," if t else b"") + orjson.dumps(name) + b":["
+                count = 0
+                query = db.query(*(getattr(model, c) for c in columns)).order_by(model.id).yield_per(1000)
+                for row in query:
+                    # orjson writes datetimes as ISO 8601, like isoformat()
+                    yield (b"," if count else b"") + orjson.dumps(row._asdict())
+                    count += 1
+                counts[name] = count
+                yield b"]"
+            yield b'},"counts":' + orjson.dumps(counts) + b"}"
+        except Exception:
+            logger.exception("Database backup failed mid-stream")
+            raise
+        finally:
+            db.close()
+
+    return StreamingResponse(_stream(), media_type="application/json")
 
 
 @app.post("/restore-database")
@@ -382,19 +464,23 @@ def restore_database(backup_data: dict):
     WARNING: This will clear existing data and restore from backup.
     Only use this after setting up PostgreSQL.
     """
-    from .db.models import SessionLocal, User, Club
-    from .auth import hash_password
-
     db = SessionLocal()
     try:
         data = backup_data.get("data", {})
 
-        # Restore clubs
-        clubs_restored = 0
-        for club_data in data.get("clubs", []):
-            existing = db.query(Club).filter(Club.code == club_data["code"]).first()
-            if not existing:
-                club = Club(
+        # Restore clubs (collected, then inserted in one executemany).
+        # Existing codes are fetched in one query and checked in memory.
+        clubs_data = data.get("clubs", [])
+        seen_codes = {
+            code for (code,) in db.query(Club.code).filter(
+                Club.code.in_({c["code"] for c in clubs_data})
+            )
+        } if clubs_data else set()
+        new_clubs = []
+        for club_data in clubs_data:
+            if club_data["code"] not in seen_codes:
+                seen_codes.add(club_data["code"])
+                new_clubs.append(dict(
                     name=club_data["name"],
                     code=club_data["code"],
                     subscription_tier=club_data.get("subscription_tier", "free"),
@@ -405,37 +491,47 @@ def restore_database(backup_data: dict):
                     description=club_data.get("description"),
                     location=club_data.get("location"),
                     website=club_data.get("website")
-                )
-                db.add(club)
-                clubs_restored += 1
+                ))
 
+        if new_clubs:
+            db.execute(insert(Club), new_clubs)
         db.commit()
 
-        # Restore users (with default password that must be reset)
-        users_restored = 0
-        for user_data in data.get("users", []):
-            existing = db.query(User).filter(User.email == user_data["email"]).first()
-            if not existing:
-                user = User(
+        # Restore users (with default password that must be reset). Every
+        # restored user shares the same default, so hash it once, not per user.
+        users_data = data.get("users", [])
+        seen_emails = {
+            email for (email,) in db.query(User.email).filter(
+                User.email.in_({u["email"] for u in users_data})
+            )
+        } if users_data else set()
+        new_users = []
+        default_pw_hash = None
+        for user_data in users_data:
+            if user_data["email"] not in seen_emails:
+                seen_emails.add(user_data["email"])
+                if default_pw_hash is None:
+                    default_pw_hash = hash_password("resetme123")
+                new_users.append(dict(
                     email=user_data["email"],
                     name=user_data["name"],
-                    password_hash=hash_password("resetme123"),  # Default password
+                    password_hash=default_pw_hash,  # Default password
                     club_id=user_data.get("club_id"),
                     role=user_data.get("role", "sailor"),
                     sail_number=user_data.get("sail_number"),
                     is_active=user_data.get("is_active", True)
-                )
-                db.add(user)
-                users_restored += 1
+                ))
 
+        if new_users:
+            db.execute(insert(User), new_users)
         db.commit()
 
         return {
             "success": True,
             "message": "Database restored from backup",
             "restored": {
-                "clubs": clubs_restored,
-                "users": users_restored
+                "clubs": len(new_clubs),
+                "users": len(new_users)
             },
             "note": "All restored users have password 'resetme123' - they should reset via forgot password"
         }
@@ -456,8 +552,6 @@ def check_email_config():
     Check email configuration status.
     Returns whether RESEND_API_KEY is configured (without exposing the key).
     """
-    import os
-
     resend_key = os.getenv("RESEND_API_KEY", "")
     from_email = os.getenv("FROM_EMAIL", "RacePilot <info@race-pilot.app>")
 
@@ -475,8 +569,6 @@ def check_database_config():
     Check database configuration.
     Returns database type and connection info without exposing sensitive data.
     """
-    import os
-
     database_url = os.getenv("DATABASE_URL", "sqlite:///./racepilot.db")
 
     # Determine database type
@@ -484,7 +576,6 @@ def check_database_config():
         db_type = "postgresql"
         # Extract host without password
         try:
-            from urllib.parse import urlparse
             parsed = urlparse(database_url)
             host_info = f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
         except:
@@ -512,7 +603,6 @@ def migrate_session_numbers(reset_all: bool = False):
 
     Use ?reset_all=true to reassign ALL session numbers (fixes duplicates).
     """
-    from .db.models import Session, SessionLocal
     db = SessionLocal()
     try:
         # Get all sessions ordered by user and start time
@@ -547,49 +637,3 @@ def migrate_session_numbers(reset_all: bool = False):
         }
     finally:
         db.close()
-
-
-# Include routers that loaded successfully
-if AUTH_AVAILABLE and auth:
-    app.include_router(auth.router, prefix="/auth", tags=["auth"])
-    print("[OK] Auth routes loaded")
-
-if SESSIONS_AVAILABLE and sessions:
-    app.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
-    print("[OK] Sessions routes loaded")
-
-if TELEMETRY_AVAILABLE and telemetry:
-    app.include_router(telemetry.router, prefix="/telemetry", tags=["telemetry"])
-    print("[OK] Telemetry routes loaded")
-
-if ANALYTICS_AVAILABLE and analytics:
-    app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
-    print("[OK] Analytics routes loaded")
-
-if COURSES_AVAILABLE and courses:
-    app.include_router(courses.router, prefix="/courses", tags=["courses"])
-    print("[OK] Courses routes loaded")
-
-if AI_AVAILABLE and ai:
-    app.include_router(ai.router, prefix="/ai", tags=["ai"])
-    print("[OK] AI routes loaded")
-
-if CLUBS_AVAILABLE and clubs:
-    app.include_router(clubs.router, prefix="/clubs", tags=["clubs"])
-    print("[OK] Clubs routes loaded")
-
-if CHALLENGES_AVAILABLE and challenges:
-    app.include_router(challenges.router, tags=["challenges"])
-    print("[OK] Challenges routes loaded")
-
-if VIDEOS_AVAILABLE and videos:
-    app.include_router(videos.router, tags=["videos"])
-    print("[OK] Videos routes loaded")
-
-if PAYMENTS_AVAILABLE and payments:
-    app.include_router(payments.router)
-    print("[OK] Payments routes loaded")
-
-if BOAT_CLASSES_AVAILABLE and boat_classes:
-    app.include_router(boat_classes.router, prefix="/boat-classes", tags=["boat-classes"])
-    print("[OK] Boat Classes routes loaded")
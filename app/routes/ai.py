@@ -5,12 +5,18 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import math
-from sqlalchemy.orm import Session as DbSession
+import numpy as np
+from sqlalchemy.orm import Session as DbSession, load_only, undefer
 
 from ..db.models import SessionLocal, TrackPoint, Maneuver, PerformanceBaseline, PerformanceAnomaly, Session, FleetComparison, Boat, BoatClass, VMGOptimization, CoachingRecommendation, WindShift, WindPattern, User
 from ..auth import require_subscription, get_current_user, get_db
-from sqlalchemy import and_
-from geopy.distance import geodesic
+from ..services.analytics_cache import find_baseline, find_vmg_optimization, get_vmg_optimizations, get_baseline_arrays
+from ..services.ai import track_length_km
+from ..services.track_columns import stream_columns
+from ..services.maneuver_kernels import (
+    movavg, find_candidates, select_maneuvers, classify_turns, score_maneuvers,
+)
+from sqlalchemy import and_, case, func, insert, select, text
 
 # Optional ML dependencies - AI features disabled if not available
 try:
@@ -73,47 +79,6 @@ class DetectResponse(BaseModel):
     params_used: Dict[str, Any]
 
 
-# ------------------------------
-# Helper Functions
-# ------------------------------
-
-def unwrap_deg(degs: List[float]) -> List[float]:
-    """Unwrap heading values for continuous curves."""
-    out = []
-    last = None
-    offset = 0
-    for d in degs:
-        if last is None:
-            out.append(d)
-            last = d
-            continue
-        diff = d - last
-        if diff > 180:
-            offset -= 360
-        elif diff < -180:
-            offset += 360
-        out.append(d + offset)
-        last = d
-    return out
-
-
-def movavg(vals: List[float], w: int) -> List[float]:
-    """Simple moving average smoothing."""
-    if w <= 1 or len(vals) < w:
-        return vals[:]
-    out = []
-    acc = 0
-    for i, v in enumerate(vals):
-        acc += v
-        if i >= w:
-            acc -= vals[i - w]
-        if i >= w - 1:
-            out.append(acc / w)
-        else:
-            out.append(vals[i])  # warm-up
-    return out
-
-
 # ------------------------------
 # Core Route
 # ------------------------------
@@ -122,144 +87,122 @@ def movavg(vals: List[float], w: int) -> List[float]:
 def detect_maneuvers(req: DetectRequest):
     db = SessionLocal()
     try:
-        pts = (
-            db.query(TrackPoint)
-            .filter(TrackPoint.session_id == req.session_id)
-            .order_by(TrackPoint.ts.asc())
-            .all()
+        # Just the columns used, streamed in batches straight into per-column
+        # arrays/lists (server-side cursor on PostgreSQL)
+        cols = stream_columns(
+            db,
+            select(TrackPoint.ts, TrackPoint.ts_us, TrackPoint.sog, TrackPoint.cog, TrackPoint.lat, TrackPoint.lon)
+            .where(TrackPoint.session_id == req.session_id)
+            .order_by(TrackPoint.ts.asc()),
+            arrays=("ts_us", "sog", "cog"),
         )
+        ts, lat, lon = cols["ts"], cols["lat"], cols["lon"]
+        n = len(ts)
 
-        if not pts or len(pts) < 3:
+        if n < 3:
             return DetectResponse(
                 session_id=req.session_id,
                 maneuvers=[],
                 params_used=req.dict()
             )
 
-        ts = [p.ts for p in pts]
-        sog = [float(p.sog or 0.0) for p in pts]
-        cog = [float(p.cog or 0.0) for p in pts]
+        # Seconds since the first sample, computed once. Integer ts_us (exact
+        # in float64) avoids datetime arithmetic; older rows without it fall back to ts.
+        ts_us = cols["ts_us"]
+        if not np.isnan(ts_us).any():
+            ts_sec = (ts_us - ts_us[0]) / 1e6
+        else:
+            t_first = ts[0]
+            ts_sec = np.fromiter(((t - t_first).total_seconds() for t in ts), dtype=np.float64, count=n)
+        # Missing readings (None -> NaN) count as 0
+        sog = cols["sog"]
+        sog[np.isnan(sog)] = 0.0
+        cog = cols["cog"]
+        cog[np.isnan(cog)] = 0.0
 
         # Smooth noisy phone data
         sog_s = movavg(sog, req.smooth_window)
-        cog_u = unwrap_deg(cog)
+        cog_u = np.unwrap(cog, period=360.0)  # continuous heading across 0/360
         cog_s = movavg(cog_u, req.smooth_window)
 
         maneuvers = []
-        i = 0
-        n = len(pts)
-
-        while i < n - 2:
-            # Skip stationary/non-sailing noise
-            if sog_s[i] < req.min_sog_kn:
-                i += 1
-                continue
-
-            start_t = ts[i]
-
-            # Look ahead until max_window_sec
-            j = i + 1
-            while j < n and (ts[j] - start_t).total_seconds() <= req.max_window_sec:
-                j += 1
-
-            if j - i < 2:
-                i += 1
-                continue
-
-            # Compute turn metrics
-            head_start = cog_s[i]
-            head_end = cog_s[j - 1]
-            dtheta = abs(head_end - head_start)
-
-            window_sog = sog_s[i:j]
-            entry = window_sog[0]
-            vmin = min(window_sog)
-            speed_drop = max(0.0, entry - vmin)
-
-            # Strong enough turn + meaningful slowdown?
-            if dtheta >= req.theta_min_deg and speed_drop >= req.speed_drop_kn:
-
-                # Duration
-                t0 = ts[i]
-                t1 = ts[j - 1]
-                duration = (t1 - t0).total_seconds()
-
-                # Classify type
-                mtype = "turn"
-                if req.twd is not None:
-
-                    def diff(a, b):
-                        """Shortest signed angle difference."""
-                        return (a - b + 540) % 360 - 180
-
-                    sdiff = diff(head_start % 360, req.twd % 360)
-                    ediff = diff(head_end % 360, req.twd % 360)
 
-                    # Tack crosses the wind direction
-                    if (sdiff > 0 > ediff) or (sdiff < 0 < ediff):
-                        mtype = "tack"
-                    else:
-                        # Gybe if turn happens near 180° to wind
-                        mid_h = (head_start + head_end) / 2
-                        if abs(diff(mid_h % 360, (req.twd + 180) % 360)) < 60:
-                            mtype = "gybe"
-
-                # Score 0–100
-                Wt, Ws, Wa = 1.5, 12.0, 0.25
-                score = 100 - (Wt * duration) - (Ws * speed_drop) - (Wa * max(0, dtheta - 110))
-                score = int(max(0, min(100, round(score))))
-
-                # Get coordinates for start and end positions
-                start_pt = pts[i]
-                end_pt = pts[j - 1]
-
-                # Create maneuver response object
-                maneuver_data = ManeuverResponse(
-                    type=mtype,
-                    start_ts=t0,
-                    end_ts=t1,
-                    angle_change_deg=round(dtheta, 1),
-                    entry_sog_kn=round(entry, 2),
-                    min_sog_kn=round(vmin, 2),
-                    time_through_sec=round(duration, 1),
-                    speed_loss_kn=round(speed_drop, 2),
-                    score_0_100=score,
-                )
-                maneuvers.append(maneuver_data)
-
-                # Save to database
-                db_maneuver = Maneuver(
-                    session_id=req.session_id,
-                    maneuver_type=mtype,
-                    start_ts=t0,
-                    end_ts=t1,
-                    angle_change_deg=round(dtheta, 1),
-                    entry_sog_kn=round(entry, 2),
-                    min_sog_kn=round(vmin, 2),
-                    time_through_sec=round(duration, 1),
-                    speed_loss_kn=round(speed_drop, 2),
-                    score_0_100=score,
-                    start_lat=start_pt.lat,
-                    start_lon=start_pt.lon,
-                    end_lat=end_pt.lat,
-                    end_lon=end_pt.lon,
-                    twd=req.twd,
-                    detection_params={
-                        "theta_min_deg": req.theta_min_deg,
-                        "max_window_sec": req.max_window_sec,
-                        "smooth_window": req.smooth_window,
-                        "min_sog_kn": req.min_sog_kn,
-                        "speed_drop_kn": req.speed_drop_kn,
-                    }
-                )
-                db.add(db_maneuver)
-
-                i = j
-                continue
+        # Every start index that would qualify on its own
+        candidates, j_arr, window_min = find_candidates(
+            ts_sec, sog_s, cog_s,
+            req.max_window_sec, req.min_sog_kn, req.theta_min_deg, req.speed_drop_kn,
+        )
 
-            i += 1
+        # Greedy left-to-right pass: a maneuver consumes its window
+        starts = select_maneuvers(candidates, j_arr)
+        ends = j_arr[starts] - 1
+
+        # Turn metrics for all maneuvers at once
+        head_start = cog_s[starts]
+        head_end = cog_s[ends]
+        dtheta = np.abs(head_end - head_start)
+        entry = sog_s[starts]
+        vmin = window_min[starts]
+        speed_drop = np.maximum(0.0, entry - vmin)
+        duration = ts_sec[ends] - ts_sec[starts]
+
+        types = classify_turns(head_start, head_end, req.twd)
+        scores = score_maneuvers(duration, speed_drop, dtheta)
+
+        detection_params = {
+            "theta_min_deg": req.theta_min_deg,
+            "max_window_sec": req.max_window_sec,
+            "smooth_window": req.smooth_window,
+            "min_sog_kn": req.min_sog_kn,
+            "speed_drop_kn": req.speed_drop_kn,
+        }
+        rows = []
+
+        for i, k, mtype, score, dth, ent, vmn, drop, dur in zip(
+            starts.tolist(), ends.tolist(), types.tolist(), scores.tolist(),
+            dtheta.tolist(), entry.tolist(), vmin.tolist(), speed_drop.tolist(), duration.tolist(),
+        ):
+            t0 = ts[i]
+            t1 = ts[k]
+
+            # Create maneuver response object; values are computed here, so skip
+            # validation (response_model still validates the whole response)
+            maneuver_data = ManeuverResponse.model_construct(
+                type=mtype,
+                start_ts=t0,
+                end_ts=t1,
+                angle_change_deg=round(dth, 1),
+                entry_sog_kn=round(ent, 2),
+                min_sog_kn=round(vmn, 2),
+                time_through_sec=round(dur, 1),
+                speed_loss_kn=round(drop, 2),
+                score_0_100=score,
+            )
+            maneuvers.append(maneuver_data)
+
+            # Row for the bulk insert below
+            rows.append({
+                "session_id": req.session_id,
+                "maneuver_type": mtype,
+                "start_ts": t0,
+                "end_ts": t1,
+                "angle_change_deg": maneuver_data.angle_change_deg,
+                "entry_sog_kn": maneuver_data.entry_sog_kn,
+                "min_sog_kn": maneuver_data.min_sog_kn,
+                "time_through_sec": maneuver_data.time_through_sec,
+                "speed_loss_kn": maneuver_data.speed_loss_kn,
+                "score_0_100": score,
+                "start_lat": lat[i],
+                "start_lon": lon[i],
+                "end_lat": lat[k],
+                "end_lon": lon[k],
+                "twd": req.twd,
+                "detection_params": detection_params,
+            })
 
-        # Commit all maneuvers to database
+        # Save all maneuvers in one executemany INSERT (no per-object unit of work)
+        if rows:
+            db.execute(insert(Maneuver), rows)
         db.commit()
 
         return DetectResponse(
@@ -328,6 +271,10 @@ def get_maneuver_stats(session_id: int):
     try:
         maneuvers = (
             db.query(Maneuver)
+            .options(load_only(
+                Maneuver.id, Maneuver.maneuver_type, Maneuver.start_ts, Maneuver.score_0_100,
+                Maneuver.time_through_sec, Maneuver.speed_loss_kn
+            ))
             .filter(Maneuver.session_id == session_id)
             .all()
         )
@@ -397,60 +344,70 @@ def calculate_baseline_for_boat(db, boat_id: int, force_recalc: bool = False):
     twa_bins = [(0, 50), (50, 70), (70, 110), (110, 180)]  # Close-hauled, Reaching, Broad reach, Running
 
     # Get all sessions for this boat
-    sessions = db.query(Session).filter(Session.boat_id == boat_id).all()
-    session_ids = [s.id for s in sessions]
+    session_ids = [s.id for s in db.query(Session.id).filter(Session.boat_id == boat_id)]
 
     if not session_ids:
         return []
 
-    # Get all track points with wind data
-    points = (
-        db.query(TrackPoint)
+    # Per-bin count, mean and mean square of sog computed in the database
+    # (bins are [min, max)), so no track points are loaded into Python
+    tws_bin = case(
+        *((and_(TrackPoint.tws >= lo, TrackPoint.tws < hi), k) for k, (lo, hi) in enumerate(tws_bins))
+    )
+    twa_abs = func.abs(TrackPoint.twa)
+    twa_bin = case(
+        *((and_(twa_abs >= lo, twa_abs < hi), k) for k, (lo, hi) in enumerate(twa_bins))
+    )
+    bin_stats = (
+        db.query(
+            tws_bin.label("tws_bin"),
+            twa_bin.label("twa_bin"),
+            func.count().label("n"),
+            func.avg(TrackPoint.sog).label("avg_sog"),
+            func.avg(TrackPoint.sog * TrackPoint.sog).label("avg_sq"),
+        )
         .filter(and_(
             TrackPoint.session_id.in_(session_ids),
             TrackPoint.tws.isnot(None),
             TrackPoint.twa.isnot(None),
             TrackPoint.sog > 0.5  # Filter out stopped/drifting
         ))
+        # Group by the output aliases: PostgreSQL won't match repeated CASE
+        # expressions whose bounds are separate bind parameters
+        .group_by(text("tws_bin"), text("twa_bin"))
+        .having(func.count() >= 10)  # Need at least 10 points for meaningful statistics
         .all()
     )
+    stats = {(r.tws_bin, r.twa_bin): r for r in bin_stats if r.tws_bin is not None and r.twa_bin is not None}
+
+    # Existing baselines for this boat, looked up per bin below
+    existing_map = {
+        (bl.tws_min, bl.tws_max, bl.twa_min, bl.twa_max): bl
+        for bl in db.query(PerformanceBaseline).filter(PerformanceBaseline.boat_id == boat_id)
+    }
 
     baselines = []
 
     # Calculate baseline for each combination of wind conditions
-    for tws_min, tws_max in tws_bins:
-        for twa_min, twa_max in twa_bins:
-            # Filter points in this wind condition
-            bin_points = [
-                p for p in points
-                if tws_min <= p.tws < tws_max and twa_min <= abs(p.twa) < twa_max
-            ]
-
-            if len(bin_points) < 10:  # Need at least 10 points for meaningful statistics
+    for ti, (tws_min, tws_max) in enumerate(tws_bins):
+        for ai, (twa_min, twa_max) in enumerate(twa_bins):
+            row = stats.get((ti, ai))
+            if row is None:
                 continue
 
-            # Calculate statistics
-            speeds = [p.sog for p in bin_points]
-            avg_sog = sum(speeds) / len(speeds)
-            variance = sum((s - avg_sog) ** 2 for s in speeds) / len(speeds)
-            std_sog = variance ** 0.5
+            # Population std from E[x²] - E[x]², clamped against rounding below zero
+            sample_count = int(row.n)
+            avg_sog = float(row.avg_sog)
+            std_sog = max(0.0, float(row.avg_sq) - avg_sog ** 2) ** 0.5
 
             # Check if baseline exists
-            existing = db.query(PerformanceBaseline).filter(
-                and_(
-                    PerformanceBaseline.boat_id == boat_id,
-                    PerformanceBaseline.tws_min == tws_min,
-                    PerformanceBaseline.tws_max == tws_max,
-                    PerformanceBaseline.twa_min == twa_min,
-                    PerformanceBaseline.twa_max == twa_max
-                )
-            ).first()
+            existing = existing_map.get((tws_min, tws_max, twa_min, twa_max))
 
             if existing and not force_recalc:
                 # Update existing
                 existing.avg_sog = avg_sog
                 existing.std_sog = std_sog
-                existing.sample_count = len(bin_points)
+                existing.sample_count = sample_count
                 existing.last_updated = datetime.utcnow()
             else:
                 # Create new
@@ -462,7 +419,7 @@ def calculate_baseline_for_boat(db, boat_id: int, force_recalc: bool = False):
                     twa_max=twa_max,
                     avg_sog=avg_sog,
                     std_sog=std_sog,
-                    sample_count=len(bin_points),
+                    sample_count=sample_count,
                     last_updated=datetime.utcnow()
                 )
                 db.add(baseline)
@@ -482,19 +439,14 @@ def detect_anomalies(session_id: int, z_threshold: float = 2.0):
         if not session:
             return {"error": "Session not found"}
 
-        # Ensure we have baselines for this boat
-        baselines_count = db.query(PerformanceBaseline).filter(
-            PerformanceBaseline.boat_id == session.boat_id
-        ).count()
+        # Baselines for this boat and their column arrays (cached, evicted
+        # when the baselines change)
+        baselines, bl_arrays = get_baseline_arrays(db, session.boat_id)
 
-        if baselines_count == 0:
+        if not baselines:
             # Calculate baselines first
             calculate_baseline_for_boat(db, session.boat_id)
-
-        # Get all baselines for this boat
-        baselines = db.query(PerformanceBaseline).filter(
-            PerformanceBaseline.boat_id == session.boat_id
-        ).all()
+            baselines, bl_arrays = get_baseline_arrays(db, session.boat_id)
 
         if not baselines:
             return {
@@ -503,110 +455,137 @@ def detect_anomalies(session_id: int, z_threshold: float = 2.0):
                 "message": "Insufficient data to establish performance baselines"
             }
 
-        # Get track points with wind data
-        points = (
-            db.query(TrackPoint)
-            .filter(and_(
+        # Get track points with wind data (only the columns used), streamed in
+        # batches into per-column arrays/lists
+        points = stream_columns(
+            db,
+            select(TrackPoint.id, TrackPoint.ts, TrackPoint.lat, TrackPoint.lon, TrackPoint.sog, TrackPoint.tws, TrackPoint.twa)
+            .where(and_(
                 TrackPoint.session_id == session_id,
                 TrackPoint.tws.isnot(None),
                 TrackPoint.twa.isnot(None),
                 TrackPoint.sog > 0.5
-            ))
-            .all()
+            )),
+            arrays=("sog", "tws", "twa"),
         )
+        sog, tws, twa = points["sog"], points["tws"], points["twa"]
 
         anomalies = []
 
-        for point in points:
-            # Find matching baseline
-            matching_baseline = None
-            for bl in baselines:
-                if (bl.tws_min <= point.tws < bl.tws_max and
-                    bl.twa_min <= abs(point.twa) < bl.twa_max):
-                    matching_baseline = bl
-                    break
+        # Match every point to the first baseline whose bin contains it (-1 = none):
+        # baselines are applied last-to-first so earlier ones win
+        abs_twa = np.abs(twa)
+        match = np.full(len(sog), -1, dtype=np.intp)
+        for k in range(len(baselines) - 1, -1, -1):
+            in_bin = (
+                (bl_arrays["tws_min"][k] <= tws) & (tws < bl_arrays["tws_max"][k])
+                & (bl_arrays["twa_min"][k] <= abs_twa) & (abs_twa < bl_arrays["twa_max"][k])
+            )
+            match[in_bin] = k
+
+        # z-score against the matched baseline; unmatched or zero-spread bins are skipped
+        avg_lut = np.append(bl_arrays["avg_sog"], np.nan)
+        std_lut = np.append(bl_arrays["std_sog"], np.nan)
+        std = std_lut[match]  # -1 picks the trailing NaN
+        usable = (match >= 0) & (std != 0)
+        deviation = sog - avg_lut[match]
+        z = np.where(usable, deviation / np.where(usable, std, 1.0), 0.0)
+
+        # Anomalies are significantly slower than expected (negative z)
+        anomaly_idx = np.flatnonzero(usable & (z < -z_threshold))
+
+        # Session maneuvers, fetched once, for the "recent tack" check
+        maneuver_windows = []
+        if len(anomaly_idx):
+            maneuver_windows = (
+                db.query(Maneuver.start_ts, Maneuver.end_ts)
+                .filter(Maneuver.session_id == session_id)
+                .all()
+            )
 
-            if not matching_baseline or matching_baseline.std_sog == 0:
-                continue
+        for k in anomaly_idx.tolist():
+            point_ts = points["ts"][k]
+            point_sog, point_tws, point_twa = float(sog[k]), float(tws[k]), float(twa[k])
+            matching_baseline = baselines[match[k]]
+            z_score = float(z[k])
+            point_deviation = float(deviation[k])
+
+            # Determine severity
+            if z_score < -3.0:
+                severity = "severe"
+            elif z_score < -2.5:
+                severity = "moderate"
+            else:
+                severity = "minor"
 
-            # Calculate z-score
-            deviation = point.sog - matching_baseline.avg_sog
-            z_score = deviation / matching_baseline.std_sog
-
-            # Check if anomaly (significantly slower)
-            if z_score < -z_threshold:  # Negative = slower than expected
-                # Determine severity
-                if z_score < -3.0:
-                    severity = "severe"
-                elif z_score < -2.5:
-                    severity = "moderate"
-                else:
-                    severity = "minor"
-
-                # Analyze possible causes
-                possible_causes = []
-
-                # Check if just after a tack
-                recent_maneuver = db.query(Maneuver).filter(
-                    and_(
-                        Maneuver.session_id == session_id,
-                        Maneuver.start_ts <= point.ts,
-                        Maneuver.end_ts >= point.ts - timedelta(seconds=10)
-                    )
-                ).first()
-
-                if recent_maneuver:
-                    possible_causes.append("Speed loss from recent tack/gybe")
-
-                # Check wind angle (pinching or sailing too low)
-                if abs(point.twa) < 35:
-                    possible_causes.append("Sailing too close to wind (pinching)")
-                elif abs(point.twa) > 50 and matching_baseline.twa_max <= 70:
-                    possible_causes.append("Sailing too low (footing)")
-
-                # Check if wind dropped
-                if point.tws < matching_baseline.tws_min + 2:
-                    possible_causes.append("Wind speed below normal for conditions")
-
-                if not possible_causes:
-                    possible_causes.append("Unknown - review sail trim and technique")
-
-                # Create anomaly record
-                anomaly = PerformanceAnomaly(
-                    session_id=session_id,
-                    trackpoint_id=point.id,
-                    ts=point.ts,
-                    lat=point.lat,
-                    lon=point.lon,
-                    actual_sog=point.sog,
-                    expected_sog=matching_baseline.avg_sog,
-                    deviation_kts=deviation,
-                    z_score=z_score,
-                    severity=severity,
-                    possible_causes=possible_causes,
-                    wind_speed=point.tws,
-                    wind_angle=point.twa
-                )
-                db.add(anomaly)
-                anomalies.append(anomaly)
+            # Analyze possible causes
+            possible_causes = []
+
+            # Check if just after a tack
+            recent_cutoff = point_ts - timedelta(seconds=10)
+            recent_maneuver = any(
+                m.start_ts <= point_ts and m.end_ts >= recent_cutoff
+                for m in maneuver_windows
+                if m.start_ts is not None and m.end_ts is not None
+            )
+
+            if recent_maneuver:
+                possible_causes.append("Speed loss from recent tack/gybe")
+
+            # Check wind angle (pinching or sailing too low)
+            if abs(point_twa) < 35:
+                possible_causes.append("Sailing too close to wind (pinching)")
+            elif abs(point_twa) > 50 and matching_baseline.twa_max <= 70:
+                possible_causes.append("Sailing too low (footing)")
+
+            # Check if wind dropped
+            if point_tws < matching_baseline.tws_min + 2:
+                possible_causes.append("Wind speed below normal for conditions")
+
+            if not possible_causes:
+                possible_causes.append("Unknown - review sail trim and technique")
+
+            # Anomaly record row for the bulk insert below
+            anomalies.append({
+                "session_id": session_id,
+                "trackpoint_id": points["id"][k],
+                "ts": point_ts,
+                "lat": points["lat"][k],
+                "lon": points["lon"][k],
+                "actual_sog": point_sog,
+                "expected_sog": matching_baseline.avg_sog,
+                "deviation_kts": point_deviation,
+                "z_score": z_score,
+                "severity": severity,
+                "possible_causes": possible_causes,
+                "wind_speed": point_tws,
+                "wind_angle": point_twa,
+            })
 
+        # One executemany INSERT; ids come back in row order for the response
+        anomaly_ids = []
+        if anomalies:
+            anomaly_ids = db.scalars(
+                insert(PerformanceAnomaly).returning(PerformanceAnomaly.id, sort_by_parameter_order=True),
+                anomalies,
+            ).all()
         db.commit()
 
         return {
             "session_id": session_id,
             "anomalies_detected": len(anomalies),
             "anomalies": [{
-                "id": a.id,
-                "ts": a.ts.isoformat(),
-                "lat": a.lat,
-                "lon": a.lon,
-                "actual_sog": round(a.actual_sog, 2),
-                "expected_sog": round(a.expected_sog, 2),
-                "deviation_kts": round(a.deviation_kts, 2),
-                "z_score": round(a.z_score, 2),
-                "severity": a.severity,
-                "possible_causes": a.possible_causes
-            } for a in anomalies]
+                "id": anomaly_id,
+                "ts": a["ts"].isoformat(),
+                "lat": a["lat"],
+                "lon": a["lon"],
+                "actual_sog": round(a["actual_sog"], 2),
+                "expected_sog": round(a["expected_sog"], 2),
+                "deviation_kts": round(a["deviation_kts"], 2),
+                "z_score": round(a["z_score"], 2),
+                "severity": a["severity"],
+                "possible_causes": a["possible_causes"]
+            } for anomaly_id, a in zip(anomaly_ids, anomalies)]
         }
 
     finally:
@@ -699,12 +678,17 @@ def get_boat_baselines(boat_id: int):
 # Fleet Comparison & Analytics
 # ------------------------------
 
-def calculate_vmg(sog: float, cog: float, twa: float, twd: float) -> float:
-    """Calculate Velocity Made Good towards wind."""
-    # Calculate angle to wind
-    wind_angle = abs(((cog - twd) + 180) % 360 - 180)
-    # VMG = SOG * cos(angle_to_wind)
-    return sog * math.cos(math.radians(wind_angle))
+def mean_vmg(sog, cog, twa, tws) -> Optional[float]:
+    """Average VMG towards the wind over the points that have wind data (twa and tws set, non-zero)."""
+    sog, cog, twa, tws = (np.asarray(v, dtype=np.float64) for v in (sog, cog, twa, tws))
+    has_wind = ~np.isnan(twa) & ~np.isnan(tws) & (twa != 0) & (tws != 0)
+    if not has_wind.any():
+        return None
+    # TWD = cog + twa, so the angle to the wind is |twa| wrapped into [0, 180]
+    twd = (cog + twa) % 360
+    wind_angle = np.abs(((cog - twd) + 180) % 360 - 180)
+    vmg = sog * np.cos(np.radians(wind_angle))
+    return float(vmg[has_wind].mean())
 
 
 @router.post("/fleet/compare")
@@ -727,15 +711,15 @@ def compare_sessions(
         if not session_a or not session_b:
             return {"error": "One or both sessions not found"}
 
-        # Get track points
+        # Get track points (plain row tuples of the columns compared)
         points_a = (
-            db.query(TrackPoint)
+            db.query(TrackPoint.lat, TrackPoint.lon, TrackPoint.sog, TrackPoint.cog, TrackPoint.twa, TrackPoint.tws)
             .filter(TrackPoint.session_id == session_a_id)
             .order_by(TrackPoint.ts.asc())
             .all()
         )
         points_b = (
-            db.query(TrackPoint)
+            db.query(TrackPoint.lat, TrackPoint.lon, TrackPoint.sog, TrackPoint.cog, TrackPoint.twa, TrackPoint.tws)
             .filter(TrackPoint.session_id == session_b_id)
             .order_by(TrackPoint.ts.asc())
             .all()
@@ -754,40 +738,17 @@ def compare_sessions(
         avg_vmg_b = None
         vmg_advantage = None
 
-        points_a_with_wind = [p for p in points_a if p.twa and p.tws]
-        points_b_with_wind = [p for p in points_b if p.twa and p.tws]
-
-        if points_a_with_wind and points_b_with_wind:
-            # Use simple VMG calculation
-            vmg_a_vals = []
-            for p in points_a_with_wind:
-                twd = (p.cog + p.twa) % 360
-                vmg = calculate_vmg(p.sog, p.cog, p.twa, twd)
-                vmg_a_vals.append(vmg)
-            avg_vmg_a = sum(vmg_a_vals) / len(vmg_a_vals) if vmg_a_vals else None
-
-            vmg_b_vals = []
-            for p in points_b_with_wind:
-                twd = (p.cog + p.twa) % 360
-                vmg = calculate_vmg(p.sog, p.cog, p.twa, twd)
-                vmg_b_vals.append(vmg)
-            avg_vmg_b = sum(vmg_b_vals) / len(vmg_b_vals) if vmg_b_vals else None
+        vmg_a = mean_vmg([p.sog for p in points_a], [p.cog for p in points_a], [p.twa for p in points_a], [p.tws for p in points_a])
+        vmg_b = mean_vmg([p.sog for p in points_b], [p.cog for p in points_b], [p.twa for p in points_b], [p.tws for p in points_b])
 
-            if avg_vmg_a is not None and avg_vmg_b is not None:
-                vmg_advantage = avg_vmg_a - avg_vmg_b
+        if vmg_a is not None and vmg_b is not None:
+            avg_vmg_a = vmg_a
+            avg_vmg_b = vmg_b
+            vmg_advantage = avg_vmg_a - avg_vmg_b
 
         # Calculate total distances
-        total_distance_a = 0.0
-        for i in range(len(points_a) - 1):
-            p1 = (points_a[i].lat, points_a[i].lon)
-            p2 = (points_a[i + 1].lat, points_a[i + 1].lon)
-            total_distance_a += geodesic(p1, p2).kilometers
-
-        total_distance_b = 0.0
-        for i in range(len(points_b) - 1):
-            p1 = (points_b[i].lat, points_b[i].lon)
-            p2 = (points_b[i + 1].lat, points_b[i + 1].lon)
-            total_distance_b += geodesic(p1, p2).kilometers
+        total_distance_a = track_length_km([p.lat for p in points_a], [p.lon for p in points_a])
+        total_distance_b = track_length_km([p.lat for p in points_b], [p.lon for p in points_b])
 
         distance_ratio = total_distance_a / total_distance_b if total_distance_b > 0 else 1.0
 
@@ -930,7 +891,7 @@ def get_leaderboard(
 
         for session in sessions:
             points = (
-                db.query(TrackPoint)
+                db.query(TrackPoint.sog, TrackPoint.lat, TrackPoint.lon)
                 .filter(TrackPoint.session_id == session.id)
                 .all()
             )
@@ -945,11 +906,7 @@ def get_leaderboard(
             max_speed = max(p.sog for p in points)
 
             # Distance
-            total_distance = 0.0
-            for i in range(len(points) - 1):
-                p1 = (points[i].lat, points[i].lon)
-                p2 = (points[i + 1].lat, points[i + 1].lon)
-                total_distance += geodesic(p1, p2).kilometers
+            total_distance = track_length_km([p.lat for p in points], [p.lon for p in points])
 
             # Tack stats
             maneuvers = db.query(Maneuver).filter(Maneuver.session_id == session.id).all()
@@ -1009,15 +966,14 @@ def optimize_vmg_for_boat(boat_id: int):
     db = SessionLocal()
     try:
         # Get all sessions for this boat
-        sessions = db.query(Session).filter(Session.boat_id == boat_id).all()
-        session_ids = [s.id for s in sessions]
+        session_ids = [s.id for s in db.query(Session.id).filter(Session.boat_id == boat_id)]
 
         if not session_ids:
             return {"error": "No sessions found for this boat"}
 
-        # Get all track points with wind data
+        # Get all track points with wind data (just the columns used)
         points = (
-            db.query(TrackPoint)
+            db.query(TrackPoint.tws, TrackPoint.twa, TrackPoint.sog)
             .filter(and_(
                 TrackPoint.session_id.in_(session_ids),
                 TrackPoint.tws.isnot(None),
@@ -1189,13 +1145,10 @@ def get_optimal_vmg(boat_id: int, tws: float, upwind: bool = True):
     db = SessionLocal()
     try:
         # Find matching optimization
-        optimizations = db.query(VMGOptimization).filter(
-            and_(
-                VMGOptimization.boat_id == boat_id,
-                VMGOptimization.tws_min <= tws,
-                VMGOptimization.tws_max > tws
-            )
-        ).all()
+        optimizations = [
+            opt for opt in get_vmg_optimizations(db, boat_id)
+            if opt.tws_min <= tws < opt.tws_max
+        ]
 
         if not optimizations:
             # Try to use boat class defaults
@@ -1428,11 +1381,7 @@ def analyze_and_recommend(
         is_upwind = current_twa < 90
 
         # Get optimal VMG for current conditions
-        vmg_opts = db.query(VMGOptimization).filter(
-            VMGOptimization.boat_id == boat_id,
-            VMGOptimization.tws_min <= current_tws,
-            VMGOptimization.tws_max > current_tws
-        ).first()
+        vmg_opts = find_vmg_optimization(db, boat_id, current_tws)
 
         if vmg_opts:
             if is_upwind and vmg_opts.optimal_upwind_angle:
@@ -1525,13 +1474,7 @@ def analyze_and_recommend(
         # 2. SPEED ANALYSIS
         # ====================
         # Check if speed is significantly below baseline
-        baselines = db.query(PerformanceBaseline).filter(
-            PerformanceBaseline.boat_id == boat_id,
-            PerformanceBaseline.tws_min <= current_tws,
-            PerformanceBaseline.tws_max > current_tws,
-            PerformanceBaseline.twa_min <= current_twa,
-            PerformanceBaseline.twa_max > current_twa
-        ).first()
+        baselines = find_baseline(db, boat_id, current_tws, current_twa)
 
         if baselines and baselines.sample_count >= 20:
             expected_sog = baselines.avg_sog
@@ -1699,7 +1642,9 @@ def get_session_coaching(session_id: int, limit: int = 50):
     """Get coaching recommendations for a session."""
     db = SessionLocal()
     try:
-        recommendations = db.query(CoachingRecommendation).filter(
+        recommendations = db.query(CoachingRecommendation).options(
+            undefer(CoachingRecommendation.context_data)
+        ).filter(
             CoachingRecommendation.session_id == session_id
         ).order_by(CoachingRecommendation.ts.desc()).limit(limit).all()
 
@@ -1784,12 +1729,8 @@ def calculate_twd(cog: float, twa: float) -> float:
 
 def normalize_angle_difference(angle1: float, angle2: float) -> float:
     """Calculate the smallest angle difference accounting for 360° wrap."""
-    diff = angle2 - angle1
-    if diff > 180:
-        diff -= 360
-    elif diff < -180:
-        diff += 360
-    return diff
+    # IEEE remainder wraps into [-180, 180] without branching, for any input range
+    return math.remainder(angle2 - angle1, 360.0)
 
 
 @router.post("/wind/detect-shifts/{session_id}")
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from ..db.models import SessionLocal, TrackPoint, Polar
+from ..db.models import SessionLocal, TrackPoint
 from ..schemas import StartLine, TTLRequest, AnalyticsRequest
 from ..services.ai import bearing_and_distance, start_line_bias, time_to_line, layline_recommendation, _interp_polar
+from ..services.analytics_cache import get_polar_arrays
 
 router = APIRouter()
 
@@ -22,12 +23,12 @@ def compute_ttl(req: TTLRequest):
 def laylines(req: AnalyticsRequest):
     db = SessionLocal()
     try:
-        p = db.get(Polar, req.polar_id)
-        if not p: return {"error": "polar not found"}
+        polar = get_polar_arrays(db, req.polar_id)
+        if polar is None: return {"error": "polar not found"}
         # Use last point of the session for demo
         tp = db.query(TrackPoint).filter(TrackPoint.session_id==req.session_id).order_by(TrackPoint.ts.desc()).first()
         if not tp: return {"error": "no telemetry"}
-        res = layline_recommendation(tp.lat, tp.lon, req.mark_lat, req.mark_lon, req.twd, p.data_json, req.tws, tp.twa if tp.twa is not None else 45.0)
+        res = layline_recommendation(tp.lat, tp.lon, req.mark_lat, req.mark_lon, req.twd, polar, req.tws, tp.twa if tp.twa is not None else 45.0)
         return res
     finally:
         db.close()
@@ -6,7 +6,7 @@ Handles user registration, login, profile management, and boat management.
 from datetime import datetime, timedelta
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel, validator
 import re
 
@@ -17,12 +17,15 @@ from app.auth import (
     authenticate_user,
     create_access_token,
     hash_password,
+    hash_password_async,
     Token,
     can_edit_user,
     require_role,
+    invalidate_user,
 )
 from app.email_service import send_password_reset_email, send_welcome_email
 import secrets
+import hashlib
 import asyncio
 from google.oauth2 import id_token
 from google.auth.transport import requests
@@ -171,7 +174,7 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     new_user = User(
         email=request.email,
         name=request.name,
-        password_hash=hash_password(request.password),
+        password_hash=await hash_password_async(request.password),
         club_id=club.id,
         role=request.role,
         sail_number=request.sail_number,
@@ -465,6 +468,7 @@ def update_my_profile(
 
     db.commit()
     db.refresh(current_user)
+    invalidate_user(current_user.id)
 
     club = db.query(Club).filter(Club.id == current_user.club_id).first()
 
@@ -543,7 +547,9 @@ def get_my_boats(
     """
     Get all boats owned by the current user.
     """
-    boats = db.query(Boat).filter(Boat.user_id == current_user.id).all()
+    boats = db.query(Boat).options(
+        selectinload(Boat.boat_class)
+    ).filter(Boat.user_id == current_user.id).all()
 
     return [
         BoatResponse(
@@ -713,6 +719,11 @@ class ResetPasswordRequest(BaseModel):
         return v
 
 
+def _reset_token_digest(token: str) -> bytes:
+    """Reset tokens are stored as their 32-byte SHA-256 digest, never in plain text"""
+    return hashlib.sha256(token.encode()).digest()
+
+
 @router.post("/forgot-password")
 async def forgot_password(
     request: ForgotPasswordRequest,
@@ -744,7 +755,7 @@ async def forgot_password(
     # Create new reset token (expires in 1 hour)
     token_record = PasswordResetToken(
         user_id=user.id,
-        token=reset_token,
+        token=_reset_token_digest(reset_token),
         expires_at=datetime.utcnow() + timedelta(hours=1),
         created_at=datetime.utcnow()
     )
@@ -776,7 +787,7 @@ def reset_password(
     """
     # Find token record
     token_record = db.query(PasswordResetToken).filter(
-        PasswordResetToken.token == request.token
+        PasswordResetToken.token == _reset_token_digest(request.token)
     ).first()
 
     if not token_record:
@@ -901,6 +912,7 @@ def promote_kevin_to_admin(db: Session = Depends(get_db)):
     # Promote to admin
     user.role = "admin"
     db.commit()
+    invalidate_user(user.id)
 
     return {
         "success": True,
@@ -983,6 +995,7 @@ def update_user_role(
     target_user.role = request.role
     db.commit()
     db.refresh(target_user)
+    invalidate_user(target_user.id)
 
     return {
         "success": True,
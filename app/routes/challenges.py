@@ -6,7 +6,7 @@ Allows users to create and compete against GPS tracks.
 from datetime import datetime, timedelta
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_, or_
 from pydantic import BaseModel
 
@@ -244,12 +244,14 @@ def list_challenges(
         query = query.filter(Challenge.boat_class == boat_class)
 
     # Order by created date
-    challenges = query.order_by(Challenge.created_at.desc()).all()
+    challenges = query.options(
+        selectinload(Challenge.creator)
+    ).order_by(Challenge.created_at.desc()).all()
 
     # Build response with creator names
     result = []
     for challenge in challenges:
-        creator = db.query(User).filter(User.id == challenge.creator_id).first()
+        creator = challenge.creator
         can_attempt = challenge.creator_id != current_user.id
 
         result.append(ChallengeResponse(
@@ -331,13 +333,15 @@ def get_challenge_leaderboard(
         )
 
     # Get all attempts, ordered by time_difference (fastest first)
-    attempts = db.query(ChallengeAttempt).filter(
+    attempts = db.query(ChallengeAttempt).options(
+        selectinload(ChallengeAttempt.user)
+    ).filter(
         ChallengeAttempt.challenge_id == challenge_id
     ).order_by(ChallengeAttempt.time_difference).all()
 
     result = []
     for attempt in attempts:
-        user = db.query(User).filter(User.id == attempt.user_id).first()
+        user = attempt.user
         result.append(AttemptResponse(
             id=attempt.id,
             challenge_id=attempt.challenge_id,
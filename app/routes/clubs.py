@@ -10,7 +10,7 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.db.models import User, Club
-from app.auth import get_db, get_current_user
+from app.auth import get_db, get_current_user, invalidate_user
 
 router = APIRouter(prefix="/clubs", tags=["Clubs"])
 
@@ -376,6 +376,7 @@ def update_member_role(
     user.role = request.role
     db.commit()
     db.refresh(user)
+    invalidate_user(user.id)
 
     return ClubMemberResponse(
         id=user.id,
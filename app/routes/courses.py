@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, undefer
 from ..db.models import SessionLocal, RaceCourse, RaceMark, StartLine
 from pydantic import BaseModel
 from typing import List, Optional
@@ -114,10 +114,12 @@ def create_race_course(course: RaceCourseCreate, db: Session = Depends(get_db)):
 @router.get("/courses", response_model=List[RaceCourseResponse])
 def get_race_courses(db: Session = Depends(get_db)):
     """Get all race courses"""
-    courses = db.query(RaceCourse).all()
+    courses = db.query(RaceCourse).options(
+        selectinload(RaceCourse.marks), undefer(RaceCourse.config_json)
+    ).all()
     result = []
     for course in courses:
-        marks = db.query(RaceMark).filter(RaceMark.course_id == course.id).all()
+        marks = course.marks
         result.append({
             "id": course.id,
             "name": course.name,
@@ -142,7 +144,9 @@ def get_race_courses(db: Session = Depends(get_db)):
 @router.get("/courses/{course_id}", response_model=RaceCourseResponse)
 def get_race_course(course_id: int, db: Session = Depends(get_db)):
     """Get a specific race course with all marks"""
-    course = db.query(RaceCourse).filter(RaceCourse.id == course_id).first()
+    course = db.query(RaceCourse).options(
+        undefer(RaceCourse.config_json)
+    ).filter(RaceCourse.id == course_id).first()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
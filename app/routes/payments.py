@@ -12,7 +12,7 @@ from pydantic import BaseModel
 logger = logging.getLogger(__name__)
 
 from app.db.models import User, Subscription
-from app.auth import get_db, get_current_user
+from app.auth import get_db, get_current_user, invalidate_subscription
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
@@ -173,6 +173,7 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
             )
             db.add(subscription)
             db.commit()
+            invalidate_subscription(int(user_id))
 
             print(f"[WEBHOOK] Subscription created successfully for user {user_id}", flush=True)
             print(f"[WEBHOOK] Features enabled: AI Coaching={subscription.has_ai_coaching}, Fleet Replay={subscription.has_fleet_replay}, Wind Analysis={subscription.has_wind_analysis}", flush=True)
@@ -197,6 +198,7 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
                 subscription_data['current_period_end']
             )
             db.commit()
+            invalidate_subscription(subscription.user_id)
 
     # Handle subscription cancelled
     elif event['type'] == 'customer.subscription.deleted':
@@ -213,6 +215,7 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
             subscription.has_fleet_replay = False
             subscription.has_wind_analysis = False
             db.commit()
+            invalidate_subscription(subscription.user_id)
             print(f"[WEBHOOK] Subscription cancelled and features disabled for user {subscription.user_id}", flush=True)
 
     return {"status": "success"}
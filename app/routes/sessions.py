@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session as DbSession
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session as DbSession, load_only
 from ..db.models import SessionLocal, Session as S, TrackPoint, User, Boat
 from ..schemas import SessionCreate
 from ..auth import get_current_user, get_db, check_session_limit
@@ -11,6 +12,7 @@ router = APIRouter()
 @router.post("")
 def create_session(
     req: SessionCreate,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: DbSession = Depends(get_db)
 ):
@@ -20,7 +22,7 @@ def create_session(
     Pro/Club subscribers have unlimited sessions.
     """
     # Check session limit for free users
-    check_session_limit(current_user, db)
+    check_session_limit(current_user, db, request)
 
     # Validate boat_id exists if provided
     validated_boat_id = None
@@ -106,6 +108,11 @@ def get_session_points(
     # Get all track points for this session
     points = (
         db.query(TrackPoint)
+        .options(load_only(
+            TrackPoint.id, TrackPoint.session_id, TrackPoint.ts, TrackPoint.lat, TrackPoint.lon,
+            TrackPoint.sog, TrackPoint.cog, TrackPoint.awa, TrackPoint.aws, TrackPoint.hdg,
+            TrackPoint.tws, TrackPoint.twa
+        ))
         .filter(TrackPoint.session_id == session_id)
         .order_by(TrackPoint.ts.asc())
         .all()
@@ -114,7 +121,10 @@ def get_session_points(
     if not points:
         raise HTTPException(status_code=404, detail="No track points found for this session")
 
-    return [{
+    # Returned as a response directly: ORJSONResponse is already the app
+    # default, but this skips the per-point jsonable_encoder pass FastAPI
+    # runs on plain return values (orjson encodes the datetimes itself)
+    return ORJSONResponse([{
         "id": p.id,
         "session_id": p.session_id,
         "ts": p.ts,
@@ -127,4 +137,4 @@ def get_session_points(
         "hdg": p.hdg,
         "tws": p.tws,
         "twa": p.twa,
-    } for p in points]
+    } for p in points])
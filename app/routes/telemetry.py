@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
-from ..db.models import SessionLocal, TrackPoint
+from ..db.models import SessionLocal
+from ..db.bulk import bulk_insert_trackpoints
 from ..schemas import TelemetryIngest
+from ..services.track_columns import epoch_us, utc_naive
 import logging
 
 router = APIRouter()
@@ -12,13 +14,17 @@ def ingest(req: TelemetryIngest):
     try:
         logger.info(f"Ingesting {len(req.points)} points for session {req.session_id}")
 
+        rows = []
         for p in req.points:
-            tp = TrackPoint(
-                session_id=req.session_id, ts=p.ts, lat=p.lat, lon=p.lon,
+            # Normalise to naive UTC once so ts and ts_us agree whatever the
+            # client's offset (the COPY path writes ts as text)
+            ts = utc_naive(p.ts)
+            rows.append(dict(
+                session_id=req.session_id, ts=ts, ts_us=epoch_us(ts), lat=p.lat, lon=p.lon,
                 sog=p.sog, cog=p.cog, awa=p.awa, aws=p.aws, hdg=p.hdg,
                 tws=p.tws, twa=p.twa
-            )
-            db.add(tp)
+            ))
+        bulk_insert_trackpoints(db, rows)
 
         db.commit()
         logger.info(f"Successfully committed {len(req.points)} points for session {req.session_id}")
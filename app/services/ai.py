@@ -41,6 +41,17 @@ def bearing_and_distance(lat1, lon1, lat2, lon2):
     brg = (degrees(atan2(y, x)) + 360) % 360
     return brg, d
 
+def track_length_km(lats, lons):
+    # Haversine length (km) of a track, summed over consecutive points in one
+    # vectorized pass; segments with a missing coordinate are skipped
+    R = 6371.0
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    if len(lat) < 2:
+        return 0.0
+    a = np.sin(np.diff(lat)/2)**2 + np.cos(lat[:-1])*np.cos(lat[1:])*np.sin(np.diff(lon)/2)**2
+    return float(np.nansum(2*R*np.arcsin(np.sqrt(np.minimum(a, 1.0)))))
+
 def start_line_bias(pin_brg, com_brg, twd):
     # line direction is bearing from pin->com
     line_dir = (com_brg - pin_brg) % 360
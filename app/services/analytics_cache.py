@@ -0,0 +1,165 @@
+"""
+Process-local cache for read-mostly analytics outputs.
+
+Polars, VMG optimizations and performance baselines are produced by
+occasional training/fit jobs but read on every coaching or dashboard poll.
+Loaders here return immutable snapshots (plain tuples / numpy arrays, never
+ORM instances) so they can be shared across requests and sessions. Writes
+to the underlying tables evict the affected entries via mapper events.
+"""
+
+import threading
+from collections import namedtuple
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from cachetools import TTLCache
+from sqlalchemy import event, inspect
+
+from app.db.models import Polar, PerformanceBaseline, VMGOptimization
+from app.services.polars import unpack_polar
+
+CACHE_TTL_SECONDS = 300
+
+_cache = TTLCache(maxsize=4096, ttl=CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
+
+
+def _snapshot_type(model):
+    """namedtuple with the model's eagerly-loaded columns (deferred JSON excluded)."""
+    names = [attr.key for attr in inspect(model).column_attrs if not attr.deferred]
+    return namedtuple(f"{model.__name__}Snapshot", names)
+
+
+VMGSnapshot = _snapshot_type(VMGOptimization)
+BaselineSnapshot = _snapshot_type(PerformanceBaseline)
+
+
+def _snapshot(snapshot_type, row):
+    return snapshot_type(*(getattr(row, name) for name in snapshot_type._fields))
+
+
+def _get(key):
+    with _cache_lock:
+        return _cache.get(key)
+
+
+def _put(key, value):
+    with _cache_lock:
+        _cache[key] = value
+    return value
+
+
+def invalidate(kind: str, ident: int) -> None:
+    """Evict one cached entry, e.g. invalidate('vmg', boat_id)."""
+    with _cache_lock:
+        _cache.pop((kind, ident), None)
+
+
+def get_polar_arrays(db, polar_id: int) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Polar grid as numpy arrays: {'tws_kn', 'twa_deg', 'target_kn'}.
+
+    Accepted anywhere the parsed data_json dict is (services.ai indexes it by key).
+    Returns None if the polar does not exist.
+    """
+    key = ("polar", polar_id)
+    cached = _get(key)
+    if cached is not None:
+        return cached
+
+    polar = db.get(Polar, polar_id)
+    if polar is None:
+        return None
+
+    arrays = unpack_polar(polar)
+    if arrays is None:
+        return None
+    for arr in arrays.values():
+        arr.setflags(write=False)
+    return _put(key, arrays)
+
+
+def get_vmg_optimizations(db, boat_id: int) -> Tuple[VMGSnapshot, ...]:
+    """All VMG optimizations for a boat, ordered by id."""
+    key = ("vmg", boat_id)
+    cached = _get(key)
+    if cached is not None:
+        return cached
+
+    rows = db.query(VMGOptimization).filter(
+        VMGOptimization.boat_id == boat_id
+    ).order_by(VMGOptimization.id).all()
+    return _put(key, tuple(_snapshot(VMGSnapshot, r) for r in rows))
+
+
+def get_baselines(db, boat_id: int) -> Tuple[BaselineSnapshot, ...]:
+    """All performance baselines for a boat, ordered by id."""
+    key = ("baseline", boat_id)
+    cached = _get(key)
+    if cached is not None:
+        return cached
+
+    rows = db.query(PerformanceBaseline).filter(
+        PerformanceBaseline.boat_id == boat_id
+    ).order_by(PerformanceBaseline.id).all()
+    return _put(key, tuple(_snapshot(BaselineSnapshot, r) for r in rows))
+
+
+def get_baseline_arrays(db, boat_id: int) -> Tuple[Tuple[BaselineSnapshot, ...], Dict[str, np.ndarray]]:
+    """
+    A boat's baselines (ordered by id) together with the same baselines as
+    read-only column arrays {'tws_min', 'tws_max', 'twa_min', 'twa_max',
+    'avg_sog', 'std_sog'} for matching many points at once (missing values are NaN).
+    """
+    key = ("baseline_arrays", boat_id)
+    cached = _get(key)
+    if cached is not None:
+        return cached
+
+    baselines = get_baselines(db, boat_id)
+    arrays = {}
+    for name in ("tws_min", "tws_max", "twa_min", "twa_max", "avg_sog", "std_sog"):
+        arr = np.array([getattr(b, name) for b in baselines], dtype=np.float64)
+        arr.setflags(write=False)
+        arrays[name] = arr
+    return _put(key, (baselines, arrays))
+
+
+def find_vmg_optimization(db, boat_id: int, tws: float) -> Optional[VMGSnapshot]:
+    """First VMG optimization whose wind range contains tws."""
+    if tws is None:
+        return None
+    for opt in get_vmg_optimizations(db, boat_id):
+        if opt.tws_min <= tws < opt.tws_max:
+            return opt
+    return None
+
+
+def find_baseline(db, boat_id: int, tws: float, twa: float) -> Optional[BaselineSnapshot]:
+    """First baseline whose wind speed/angle bin contains (tws, twa)."""
+    if tws is None or twa is None:
+        return None
+    for b in get_baselines(db, boat_id):
+        if b.tws_min <= tws < b.tws_max and b.twa_min <= twa < b.twa_max:
+            return b
+    return None
+
+
+# Evict on any ORM write to the cached tables
+def _evict_polar(mapper, connection, target):
+    invalidate("polar", target.id)
+
+
+def _evict_vmg(mapper, connection, target):
+    invalidate("vmg", target.boat_id)
+
+
+def _evict_baseline(mapper, connection, target):
+    invalidate("baseline", target.boat_id)
+    invalidate("baseline_arrays", target.boat_id)
+
+
+for _model, _handler in ((Polar, _evict_polar), (VMGOptimization, _evict_vmg), (PerformanceBaseline, _evict_baseline)):
+    for _evt in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _evt, _handler)
@@ -0,0 +1,168 @@
+"""
+Array kernels for maneuver detection.
+
+They work on all detected maneuvers of a session at once, so the only
+per-maneuver Python work left in detect_maneuvers is building the response
+and ORM objects.
+"""
+
+import numpy as np
+
+# Score weights: seconds through the turn, knots lost, degrees beyond 110
+SCORE_WEIGHTS = (1.5, 12.0, 0.25)
+
+
+def angle_diff(a, b):
+    """Shortest signed angle difference a - b in degrees, in [-180, 180)."""
+    return (np.asarray(a, dtype=np.float64) - b + 540.0) % 360.0 - 180.0
+
+
+def movavg(vals, w: int) -> np.ndarray:
+    """Simple moving average smoothing (first w-1 samples are left as-is)."""
+    vals = np.asarray(vals, dtype=np.float64)
+    if w <= 1 or len(vals) < w:
+        return vals.copy()
+    # Window sums from one running sum, written into a single output buffer
+    cs = np.cumsum(vals)
+    out = np.empty_like(vals)
+    out[:w - 1] = vals[:w - 1]
+    out[w - 1] = cs[w - 1]
+    np.subtract(cs[w:], cs[:-w], out=out[w:])
+    out[w - 1:] /= w
+    return out
+
+
+def sliding_window_min(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Minimum of values[starts[k]:ends[k]] for every window (ends > starts).
+
+    Uses a sparse table: level L holds the minimum of each run of 2**L samples,
+    so a window is covered by two overlapping runs. Building it is O(n log w)
+    for the longest window w, and each lookup is O(1), instead of scanning
+    every window (O(n·w)).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    # floor(log2(length)), exact for integers via the binary exponent
+    level = np.frexp((ends - starts).astype(np.float64))[1] - 1
+
+    table = np.empty((int(level.max()) + 1, n), dtype=np.float64)
+    table[0] = values
+    for lvl in range(1, len(table)):
+        span = 1 << (lvl - 1)
+        np.minimum(table[lvl - 1, :n - span], table[lvl - 1, span:], out=table[lvl, :n - span])
+        # Tail runs would extend past the end; never looked up at this level
+        table[lvl, n - span:] = table[lvl - 1, n - span:]
+
+    return np.minimum(table[level, starts], table[level, ends - (1 << level)])
+
+
+def find_candidates(ts_sec, sog_s, cog_s, max_window_sec, min_sog_kn, theta_min_deg, speed_drop_kn):
+    """
+    Start indices that qualify as a maneuver on their own, before overlaps
+    are resolved by select_maneuvers.
+
+    Returns (candidates, window_end, window_min): window_end[i] is the first
+    sample more than max_window_sec after i (at least i + 1), and
+    window_min[i] the minimum smoothed speed over [i, window_end[i]).
+    """
+    n = len(ts_sec)
+    idx = np.arange(n)
+    # Window ends by binary search over the (sorted) time axis
+    window_end = np.maximum(np.searchsorted(ts_sec, ts_sec + max_window_sec, side="right"), idx + 1)
+    window_min = sliding_window_min(sog_s, idx, window_end)
+
+    # Strong enough turn + meaningful slowdown, ignoring stationary noise
+    dtheta = np.abs(cog_s[window_end - 1] - cog_s)
+    drop = np.maximum(0.0, sog_s - window_min)
+    candidates = np.flatnonzero(
+        (idx < n - 2)
+        & (sog_s >= min_sog_kn)
+        & (window_end - idx >= 2)
+        & (dtheta >= theta_min_deg)
+        & (drop >= speed_drop_kn)
+    )
+    return candidates, window_end, window_min
+
+
+def _select_py(candidates: np.ndarray, window_end: np.ndarray) -> np.ndarray:
+    starts = np.empty(len(candidates), dtype=np.int64)
+    count = 0
+    next_i = 0
+    for k in range(len(candidates)):
+        i = candidates[k]
+        if i >= next_i:
+            starts[count] = i
+            count += 1
+            next_i = window_end[i]
+    return starts[:count]
+
+
+# Compiled on first use when numba is installed (optional dependency);
+# cache=True keeps the machine code on disk across restarts
+_select_impl = None
+
+
+def _select_kernel():
+    global _select_impl
+    if _select_impl is None:
+        try:
+            from numba import njit
+            _select_impl = njit(cache=True)(_select_py)
+        except ImportError:
+            _select_impl = _select_py
+    return _select_impl
+
+
+def warm_up() -> None:
+    """Compile (or load from the on-disk cache) the numba kernel ahead of the first request."""
+    kernel = _select_kernel()
+    if kernel is not _select_py:
+        kernel(np.zeros(1, dtype=np.int64), np.ones(1, dtype=np.int64))
+
+
+def select_maneuvers(candidates: np.ndarray, window_end: np.ndarray) -> np.ndarray:
+    """
+    Greedy left-to-right pass over candidate start indices: a maneuver
+    consumes its window [i, window_end[i]), so later candidates inside it are skipped.
+    """
+    if len(candidates) == 0:
+        return np.empty(0, dtype=np.int64)
+    kernel = _select_kernel()
+    if kernel is _select_py:
+        # Plain-Python fallback: iterate over a list rather than ndarray scalars
+        starts = []
+        next_i = 0
+        for i in candidates.tolist():
+            if i >= next_i:
+                starts.append(i)
+                next_i = int(window_end[i])
+        return np.asarray(starts, dtype=np.int64)
+    return kernel(candidates.astype(np.int64), window_end.astype(np.int64))
+
+
+def classify_turns(head_start: np.ndarray, head_end: np.ndarray, twd) -> np.ndarray:
+    """Label each turn 'tack', 'gybe' or 'turn' relative to the true wind direction."""
+    types = np.full(len(head_start), "turn", dtype=object)
+    if twd is None or len(head_start) == 0:
+        return types
+
+    sdiff = angle_diff(head_start % 360, twd % 360)
+    ediff = angle_diff(head_end % 360, twd % 360)
+
+    # Tack crosses the wind direction
+    tack = ((sdiff > 0) & (ediff < 0)) | ((sdiff < 0) & (ediff > 0))
+    # Gybe if turn happens near 180° to wind
+    mid_h = (head_start + head_end) / 2
+    gybe = ~tack & (np.abs(angle_diff(mid_h % 360, (twd + 180) % 360)) < 60)
+
+    types[tack] = "tack"
+    types[gybe] = "gybe"
+    return types
+
+
+def score_maneuvers(duration: np.ndarray, speed_drop: np.ndarray, dtheta: np.ndarray) -> np.ndarray:
+    """Score 0–100: penalise slow turns, speed lost and over-rotation past 110°."""
+    Wt, Ws, Wa = SCORE_WEIGHTS
+    score = 100 - (Wt * duration) - (Ws * speed_drop) - (Wa * np.maximum(0, dtheta - 110))
+    return np.clip(np.round(score), 0, 100).astype(int)
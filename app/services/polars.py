@@ -0,0 +1,54 @@
+"""
+Binary storage for polar performance grids.
+
+A polar is a boat-speed table indexed by true wind speed and angle. The
+grid axes and targets are stored as packed float32 blobs on Polar so reads
+are a frombuffer() instead of a JSON parse into Python floats.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+POLAR_DTYPE = np.float32
+
+
+def pack_polar(data: dict) -> Dict[str, bytes]:
+    """
+    Pack a polar dict {'tws_kn', 'twa_deg', 'target_kn'} into Polar blob columns.
+
+    target_kn must be shaped [len(tws_kn), len(twa_deg)].
+    """
+    tws = np.asarray(data["tws_kn"], dtype=POLAR_DTYPE)
+    twa = np.asarray(data["twa_deg"], dtype=POLAR_DTYPE)
+    target = np.asarray(data["target_kn"], dtype=POLAR_DTYPE)
+    if target.shape != (tws.size, twa.size):
+        raise ValueError(f"target_kn shape {target.shape} does not match grid ({tws.size}, {twa.size})")
+    return {
+        "tws_blob": tws.tobytes(),
+        "twa_blob": twa.tobytes(),
+        "target_blob": target.tobytes(),
+    }
+
+
+def unpack_polar(polar) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Read a Polar row into numpy arrays {'tws_kn', 'twa_deg', 'target_kn'}.
+
+    Uses the blob columns when present, falling back to data_json for rows
+    written before they existed. Returns None if the row has no grid.
+    """
+    if polar.target_blob is not None:
+        tws = np.frombuffer(polar.tws_blob, dtype=POLAR_DTYPE).astype(np.float64)
+        twa = np.frombuffer(polar.twa_blob, dtype=POLAR_DTYPE).astype(np.float64)
+        target = np.frombuffer(polar.target_blob, dtype=POLAR_DTYPE).astype(np.float64)
+        return {"tws_kn": tws, "twa_deg": twa, "target_kn": target.reshape(tws.size, twa.size)}
+
+    data = polar.data_json
+    if not data:
+        return None
+    return {
+        "tws_kn": np.asarray(data["tws_kn"], dtype=np.float64),
+        "twa_deg": np.asarray(data["twa_deg"], dtype=np.float64),
+        "target_kn": np.asarray(data["target_kn"], dtype=np.float64),
+    }
@@ -0,0 +1,56 @@
+"""
+Helpers for reading track points as numeric columns.
+
+Whole-session analysis selects just the TrackPoint columns it needs and
+works on contiguous numpy arrays rather than ORM rows.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def utc_naive(ts: datetime) -> datetime:
+    """Naive UTC datetime, the form TrackPoint.ts is stored in (aware values are converted)."""
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def epoch_us(ts: datetime) -> int:
+    """Exact UTC epoch microseconds for a (naive UTC or aware) datetime."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH) // _MICROSECOND
+
+
+def stream_columns(db, stmt, arrays=(), batch_size: int = 4096) -> Dict[str, object]:
+    """
+    Execute a column select in batches (server-side cursor on PostgreSQL) and
+    collect it column by column.
+
+    Columns named in `arrays` become float64 arrays (None -> NaN), converted
+    one batch at a time; the others are returned as lists. Only one batch of
+    row tuples is held in memory at a time.
+    """
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    names = list(result.keys())
+    parts = {name: [] for name in names}
+    for batch in result.partitions():
+        for name, column in zip(names, zip(*batch)):
+            if name in arrays:
+                parts[name].append(np.array(column, dtype=np.float64))
+            else:
+                parts[name].extend(column)
+
+    out = {}
+    for name in names:
+        if name in arrays:
+            out[name] = np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=np.float64)
+        else:
+            out[name] = parts[name]
+    return out
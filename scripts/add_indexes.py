@@ -0,0 +1,50 @@
+"""
+Migration script to create indexes declared on the models.
+Safe to run repeatedly: indexes that already exist are skipped.
+
+With --drop-stale, non-unique ix_* indexes that are no longer declared on
+the models (e.g. single-column indexes replaced by composites) are dropped.
+"""
+
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import inspect, text
+from app.db.models import engine, Base
+
+def migrate(drop_stale=False):
+    """Create any model-declared index missing from the database"""
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                print(f"Creating {index.name} on {table.name}...")
+                index.create(bind=conn, checkfirst=True)
+
+            if not drop_stale:
+                continue
+
+            declared = {index.name for index in table.indexes}
+            for ix in inspector.get_indexes(table.name):
+                name = ix["name"]
+                if not name or not name.startswith("ix_") or ix.get("unique") or name in declared:
+                    continue
+                print(f"Dropping stale {name} on {table.name}...")
+                conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+    print("\nMigration completed successfully!")
+
+if __name__ == "__main__":
+    migrate(drop_stale="--drop-stale" in sys.argv)
@@ -21,10 +21,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from app.db.models import engine, Base, Maneuver, PerformanceBaseline, PerformanceAnomaly, FleetComparison, VMGOptimization, CoachingRecommendation, WindShift, WindPattern
 from sqlalchemy import inspect
 
-def check_table_exists(table_name):
-    """Check if a table exists in the database."""
-    inspector = inspect(engine)
-    return table_name in inspector.get_table_names()
+def get_existing_tables():
+    """Return the set of table names currently in the database."""
+    return set(inspect(engine).get_table_names())
 
 def migrate_ai_tables():
     """Create AI feature tables if they don't exist."""
@@ -43,12 +42,13 @@ def migrate_ai_tables():
         ('wind_patterns', WindPattern),
     ]
 
-    # Check which tables already exist
+    # Check which tables already exist (one catalog query)
     tables_to_create = []
     tables_existing = []
+    existing = get_existing_tables()
 
     for table_name, model in new_tables:
-        if check_table_exists(table_name):
+        if table_name in existing:
             tables_existing.append(table_name)
             print(f"[OK] Table '{table_name}' already exists")
         else:
@@ -66,8 +66,8 @@ def migrate_ai_tables():
     print("-" * 60)
 
     try:
-        # Create all new tables
-        Base.metadata.create_all(bind=engine)
+        # Create the missing tables
+        Base.metadata.create_all(bind=engine, tables=[model.__table__ for _, model in tables_to_create])
 
         print("\n[SUCCESS] Migration completed successfully!")
         print("\nCreated tables:")
@@ -0,0 +1,54 @@
+"""
+Migration script to convert JSON columns to JSONB on PostgreSQL.
+Run this once after deploying the JSONB column types. No-op on SQLite.
+"""
+
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import JSON, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.models import engine, Base
+
+def _is_json(column):
+    """Plain JSON columns, and TypeDecorators (e.g. CompressedJSON) that map to JSONB on this dialect"""
+    if isinstance(column.type, JSON):
+        return True
+    impl = column.type.dialect_impl(engine.dialect)
+    return isinstance(getattr(impl, "impl", impl), JSON)
+
+def migrate():
+    """ALTER every model JSON column that is still plain json to jsonb"""
+
+    if engine.dialect.name != "postgresql":
+        print("Not a PostgreSQL database, nothing to do")
+        return
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            db_types = {c["name"]: c["type"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if not _is_json(column):
+                    continue
+                if column.name not in db_types or isinstance(db_types[column.name], JSONB):
+                    continue
+
+                print(f"Converting {table.name}.{column.name} to JSONB...")
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ALTER COLUMN {column.name} '
+                    f'TYPE JSONB USING {column.name}::jsonb'
+                ))
+
+    print("\nMigration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,50 @@
+"""
+Migration script to add packed binary grid columns to polars.
+Adds tws_blob / twa_blob / target_blob and backfills them from data_json.
+"""
+
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import inspect, text
+from app.db.models import engine, SessionLocal, Polar
+from app.services.polars import pack_polar
+
+def migrate():
+    """Add polar blob columns and backfill existing rows"""
+
+    blob_type = "BYTEA" if engine.dialect.name == "postgresql" else "BLOB"
+    existing = {c["name"] for c in inspect(engine).get_columns("polars")}
+
+    with engine.begin() as conn:
+        for column in ("tws_blob", "twa_blob", "target_blob"):
+            if column in existing:
+                print(f"{column} already exists")
+                continue
+            conn.execute(text(f"ALTER TABLE polars ADD COLUMN {column} {blob_type}"))
+            print(f"Added {column} column")
+
+    db = SessionLocal()
+    try:
+        polars = db.query(Polar).filter(Polar.target_blob == None).all()
+        for polar in polars:
+            if not polar.data_json:
+                continue
+            for column, blob in pack_polar(polar.data_json).items():
+                setattr(polar, column, blob)
+        db.commit()
+        print(f"Backfilled {len(polars)} polars")
+    except Exception as e:
+        db.rollback()
+        print(f"\nMigration failed: {e}")
+        raise
+    finally:
+        db.close()
+
+    print("\nMigration completed successfully!")
+
+if __name__ == "__main__":
+    migrate()
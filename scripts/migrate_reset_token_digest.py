@@ -0,0 +1,36 @@
+"""
+Migration script to store password reset tokens as binary SHA-256 digests.
+Outstanding reset tokens expire within an hour, so they are discarded rather
+than converted; users with a pending reset simply request a new link.
+"""
+
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from app.db.models import engine
+
+def migrate():
+    """Convert password_reset_tokens.token to a binary digest column"""
+
+    with engine.begin() as conn:
+        deleted = conn.execute(text("DELETE FROM password_reset_tokens")).rowcount
+        print(f"Discarded {deleted} outstanding reset tokens")
+
+        if engine.dialect.name == "postgresql":
+            conn.execute(text(
+                "ALTER TABLE password_reset_tokens "
+                "ALTER COLUMN token TYPE BYTEA USING convert_to(token, 'UTF8')"
+            ))
+            print("Changed password_reset_tokens.token to BYTEA")
+        else:
+            # SQLite stores BLOBs in any column regardless of declared type
+            print("SQLite: no column change needed")
+
+    print("Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
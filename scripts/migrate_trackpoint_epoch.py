@@ -0,0 +1,45 @@
+"""
+Migration script to add trackpoints.ts_us (UTC epoch microseconds).
+Adds the column and backfills it from ts for existing rows.
+"""
+
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import inspect, text
+from app.db.models import engine
+
+def migrate():
+    """Add and backfill trackpoints.ts_us"""
+
+    existing = {c["name"] for c in inspect(engine).get_columns("trackpoints")}
+
+    with engine.begin() as conn:
+        if "ts_us" not in existing:
+            print("Adding trackpoints.ts_us...")
+            conn.execute(text("ALTER TABLE trackpoints ADD COLUMN ts_us BIGINT"))
+
+        print("Backfilling ts_us from ts...")
+        if engine.dialect.name == "postgresql":
+            result = conn.execute(text(
+                "UPDATE trackpoints "
+                "SET ts_us = (EXTRACT(EPOCH FROM ts AT TIME ZONE 'UTC') * 1000000)::bigint "
+                "WHERE ts_us IS NULL AND ts IS NOT NULL"
+            ))
+        else:
+            # SQLite stores DateTime as 'YYYY-MM-DD HH:MM:SS[.ffffff]'
+            result = conn.execute(text(
+                "UPDATE trackpoints "
+                "SET ts_us = CAST(strftime('%s', ts) AS INTEGER) * 1000000 "
+                "+ CAST(substr(ts || '.000000', 21, 6) AS INTEGER) "
+                "WHERE ts_us IS NULL AND ts IS NOT NULL"
+            ))
+        print(f"Backfilled {result.rowcount} rows")
+
+    print("Migration complete!")
+
+if __name__ == "__main__":
+    migrate()
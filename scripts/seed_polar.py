@@ -1,4 +1,5 @@
 from app.db.models import SessionLocal, Polar, init_db
+from app.services.polars import pack_polar
 import json
 
 def main():
@@ -7,7 +8,7 @@ def main():
     try:
         with open("polars/demo_polar.json") as f:
             data = json.load(f)
-        p = Polar(boat_id=1, data_json=data)
+        p = Polar(boat_id=1, data_json=data, **pack_polar(data))
         db.add(p)
         db.commit()
         print("Inserted demo polar with id:", p.id)
@@ -0,0 +1,102 @@
+"""
+Check the vectorized maneuver kernels against the plain loops they replaced.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from app.services.maneuver_kernels import find_candidates, movavg, select_maneuvers, sliding_window_min
+
+# DetectRequest defaults
+MAX_WINDOW_SEC = 20.0
+MIN_SOG_KN = 1.0
+THETA_MIN_DEG = 55.0
+SPEED_DROP_KN = 0.8
+
+
+def _movavg_loop(vals, w):
+    if w <= 1 or len(vals) < w:
+        return vals[:]
+    out = []
+    acc = 0
+    for i, v in enumerate(vals):
+        acc += v
+        if i >= w:
+            acc -= vals[i - w]
+        if i >= w - 1:
+            out.append(acc / w)
+        else:
+            out.append(vals[i])
+    return out
+
+
+def _detect_loop(ts_sec, sog_s, cog_s):
+    """Start indices found by the original while-loop scan (O(n·w))."""
+    starts = []
+    n = len(ts_sec)
+    i = 0
+    while i < n - 2:
+        if sog_s[i] < MIN_SOG_KN:
+            i += 1
+            continue
+        j = i + 1
+        while j < n and ts_sec[j] - ts_sec[i] <= MAX_WINDOW_SEC:
+            j += 1
+        if j - i < 2:
+            i += 1
+            continue
+        dtheta = abs(cog_s[j - 1] - cog_s[i])
+        speed_drop = max(0.0, sog_s[i] - min(sog_s[i:j]))
+        if dtheta >= THETA_MIN_DEG and speed_drop >= SPEED_DROP_KN:
+            starts.append(i)
+            i = j
+        else:
+            i += 1
+    return starts
+
+
+def _random_track(rng, n):
+    # Irregular sampling with occasional gaps longer than the window
+    dt = rng.exponential(2.0, n)
+    dt[rng.random(n) < 0.02] += 30.0
+    ts_sec = np.concatenate([[0.0], np.cumsum(dt[1:])])
+    sog = np.clip(5.0 + np.cumsum(rng.normal(0, 0.5, n)), 0.0, 12.0)
+    cog = np.cumsum(rng.normal(0, 15.0, n))
+    return ts_sec, sog, cog
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_movavg_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    vals = rng.normal(0, 10, rng.integers(1, 200)).tolist()
+    for w in (1, 2, 5, 17):
+        np.testing.assert_allclose(movavg(vals, w), _movavg_loop(vals, w), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sliding_window_min_matches_scan(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 300))
+    values = rng.normal(0, 5, n)
+    starts = rng.integers(0, n, 500)
+    ends = np.minimum(starts + rng.integers(1, 64, 500), n)
+
+    expected = [values[s:e].min() for s, e in zip(starts, ends)]
+    np.testing.assert_array_equal(sliding_window_min(values, starts, ends), expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_selection_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    ts_sec, sog, cog = _random_track(rng, int(rng.integers(3, 600)))
+    sog_s = movavg(sog, 3)
+    cog_s = movavg(cog, 3)
+
+    candidates, window_end, _ = find_candidates(
+        ts_sec, sog_s, cog_s, MAX_WINDOW_SEC, MIN_SOG_KN, THETA_MIN_DEG, SPEED_DROP_KN,
+    )
+    starts = select_maneuvers(candidates, window_end)
+
+    assert starts.tolist() == _detect_loop(ts_sec, sog_s, cog_s)